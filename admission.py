@@ -0,0 +1,205 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# One unit of weight: a full-size (16 MB) upload or five minutes of audio, whichever is larger
+REFERENCE_BYTES = 16 * 1024 * 1024
+REFERENCE_DURATION = 300.0
+# Floor so a flood of tiny uploads still counts against the limit
+MIN_WEIGHT = 0.1
+
+# Assumed seconds per analysis until real ones have been measured, and the longest Retry-After
+DEFAULT_SECONDS = 10.0
+MAX_RETRY_AFTER = 120
+
+
+class Overloaded(Exception):
+    """Raised when the wait queue is full; retry_after is a suggested delay in seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Analysis queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def analysis_weight(size, duration=None, reference_bytes=REFERENCE_BYTES, reference_duration=REFERENCE_DURATION):
+    """Relative cost of analyzing size bytes of audio lasting duration seconds (if known)"""
+    weight = size / reference_bytes
+    if duration is not None:
+        weight = max(weight, duration / reference_duration)
+    return max(MIN_WEIGHT, weight)
+
+
+class TooLarge(Exception):
+    """Raised for a set of calls that would not be admitted even with nothing else running"""
+
+
+class _AdmittedFuture(Future):
+    """Future of an admitted call, running only once the executor has started the call itself
+
+    Admitted calls can outnumber the executor's workers (light calls share
+    capacity), so the executor's own future decides when the call is running.
+    A process pool marks at most one call beyond its busy workers as running.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.inner = None
+
+    def running(self):
+        inner = self.inner
+        return inner is not None and inner.running() and not self.done()
+
+    def cancel(self):
+        inner = self.inner
+        if inner is not None and not inner.cancel():
+            return False
+        return super().cancel()
+
+
+class _Admitted:
+    """A call waiting for capacity, and the future handed out for it"""
+
+    def __init__(self, func, args, weight):
+        self.func = func
+        self.args = args
+        self.weight = weight
+        self.future = _AdmittedFuture()
+        self.started = None
+
+
+class AdmissionController:
+    """Run weighted calls on an executor within a capacity, with a bounded FIFO wait queue
+
+    At most max_in_flight units of weight are handed to the executor at once
+    (a single call heavier than that runs alone). Up to max_queued further
+    calls wait their turn, and anything beyond that is rejected with
+    Overloaded straight away instead of piling up in memory.
+    """
+
+    def __init__(self, executor, max_in_flight, max_queued):
+        self.executor = executor
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.rejected = 0
+        self._running_weight = 0.0
+        self._running = 0
+        self._waiting = deque()
+        # Moving average of analysis wall time, for Retry-After
+        self._seconds = None
+        self._lock = threading.Lock()
+
+    def _can_start(self, weight, running_weight, running):
+        return running == 0 or running_weight + weight <= self.max_in_flight
+
+    def _fits(self, calls, idle=False):
+        # Would these calls start or find room in the queue, behind everything already waiting
+        # (or, with idle, with nothing running or waiting at all)?
+        running_weight, running, waiting = (0.0, 0, 0) if idle else (self._running_weight, self._running, len(self._waiting))
+        for call in calls:
+            if waiting == 0 and self._can_start(call.weight, running_weight, running):
+                running_weight += call.weight
+                running += 1
+            else:
+                waiting += 1
+        return waiting <= self.max_queued
+
+    def _take_ready(self):
+        # Called with the lock held: calls at the head of the queue that now fit
+        ready = []
+        while self._waiting and self._can_start(self._waiting[0].weight, self._running_weight, self._running):
+            call = self._waiting.popleft()
+            self._running_weight += call.weight
+            self._running += 1
+            ready.append(call)
+        return ready
+
+    def _retry_after(self):
+        # Called with the lock held: time for the queue ahead of a new call to drain
+        seconds = self._seconds or DEFAULT_SECONDS
+        estimate = seconds * (len(self._waiting) + 1) / max(1.0, self.max_in_flight)
+        return int(min(MAX_RETRY_AFTER, max(1, math.ceil(estimate))))
+
+    def has_room(self, weight=MIN_WEIGHT):
+        """Whether a call of this weight would be admitted right now"""
+        with self._lock:
+            return self._fits([_Admitted(None, (), weight)])
+
+    def retry_after(self):
+        """Suggested Retry-After in seconds, from recent analysis times and the queue length"""
+        with self._lock:
+            return self._retry_after()
+
+    def submit(self, func, *args, weight=1.0):
+        """Admit func(*args) and return a Future for its result; raises Overloaded"""
+        return self.submit_many([(func, args, weight)])[0]
+
+    def submit_many(self, calls):
+        """Admit several (func, args, weight) calls together or not at all; returns their Futures
+
+        Raises Overloaded when they do not fit right now, and TooLarge when they
+        never would, so retrying is pointless.
+        """
+        admitted = [_Admitted(func, args, weight) for func, args, weight in calls]
+        if not self._fits(admitted, idle=True):
+            logger.warning("Rejected %s call(s) weighing %.1f: more than %s running and %s waiting can ever hold",
+                           len(admitted), sum(call.weight for call in admitted), self.max_in_flight, self.max_queued)
+            raise TooLarge(f"{len(admitted)} analyses can never be admitted at once: at most {self.max_in_flight:g} "
+                           f"units of weight run and {self.max_queued} more analyses wait at a time")
+        with self._lock:
+            if not self._fits(admitted):
+                self.rejected += 1
+                retry_after = self._retry_after()
+                logger.warning("Rejected %s call(s): %.1f weight running, %s waiting; retry in %ss",
+                               len(admitted), self._running_weight, len(self._waiting), retry_after)
+                raise Overloaded(retry_after)
+            self._waiting.extend(admitted)
+            ready = self._take_ready()
+        for call in ready:
+            self._dispatch(call)
+        return [call.future for call in admitted]
+
+    def _dispatch(self, call):
+        call.started = time.monotonic()
+        if call.future.cancelled():
+            # Cancelled while waiting: pass its capacity on
+            self._complete(call, None)
+            return
+        try:
+            inner = self.executor.submit(call.func, *call.args)
+        except Exception as e:
+            self._complete(call, None, e)
+            return
+        call.future.inner = inner
+        inner.add_done_callback(lambda future: self._complete(call, future))
+
+    def _complete(self, call, inner, error=None):
+        elapsed = time.monotonic() - call.started
+        with self._lock:
+            self._running_weight -= call.weight
+            self._running -= 1
+            if inner is not None and not inner.cancelled():
+                self._seconds = elapsed if self._seconds is None else 0.8 * self._seconds + 0.2 * elapsed
+            ready = self._take_ready()
+
+        if inner is not None and inner.cancelled():
+            # Cancelled through call.future, which marks itself cancelled next
+            pass
+        elif not call.future.cancelled():
+            if inner is not None:
+                error = inner.exception()
+            if error is not None:
+                call.future.set_exception(error)
+            else:
+                call.future.set_result(inner.result())
+        for waiting in ready:
+            self._dispatch(waiting)
+
+    def stats(self):
+        """(weight running, calls running, calls waiting, calls rejected so far)"""
+        with self._lock:
+            return self._running_weight, self._running, len(self._waiting), self.rejected
@@ -1,28 +1,77 @@
-from flask import Flask, request, render_template, jsonify, redirect, url_for
+from flask import Flask, Response, request, render_template, jsonify, redirect, url_for
 import os
 import logging
-import traceback
+import tempfile
+import threading
+import tracemalloc
 from werkzeug.utils import secure_filename
-from audio_analyzer import MusicAnalyzer
-import json
+from audio_analyzer import FAST_VARIANT, SEGMENTS_VARIANT, MusicAnalyzer, analysis_version
+from audio_analyzer.cache import ResultCache, hash_bytes, hash_file
+from audio_analyzer.decoders import decoders_for, extension, soundfile_formats, source_duration
+from audio_analyzer.features import RATE_PROFILES
+from audio_analyzer.lazy import configure_numba_cache
+from audio_analyzer.logs import configure_logging
+from audio_analyzer.metrics import AnalysisMetrics
+from audio_analyzer.store import FeatureStore
+from audio_analyzer.pool import analyze_data, analyze_file, create_executor, summarize, warmup_status
+from audio_analyzer.preview import EXCERPT_COUNT, EXCERPT_DURATION
+from admission import AdmissionController, Overloaded, TooLarge, analysis_weight
+from jobs import JobQueue, FINISHED, FAILED
 
 app = Flask(__name__)
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-app.config['UPLOAD_FOLDER'] = 'uploads'
-
-# Configure detailed logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),  # Console output
-        logging.FileHandler('app.log')  # File output
-    ]
+app.config['MAX_FILE_SIZE'] = int(os.environ.get('MAX_UPLOAD_MB', 16)) * 1024 * 1024  # 16MB max per file by default
+app.config['MAX_BATCH_FILES'] = int(os.environ.get('MAX_BATCH_FILES', 32))
+# Whole /batch request, checked before any file is read: bounds what one batch holds in memory
+app.config['MAX_BATCH_SIZE'] = int(os.environ.get('MAX_BATCH_MB', 64)) * 1024 * 1024
+# Whole-request cap for any route, with room for the multipart headers of a full batch
+app.config['MAX_CONTENT_LENGTH'] = (max(app.config['MAX_FILE_SIZE'], app.config['MAX_BATCH_SIZE'])
+                                    + 64 * 1024 * app.config['MAX_BATCH_FILES'])
+# Uploads soundfile can read (WAV/FLAC/OGG, and MP3 with libsndfile 1.1+) larger than this are spooled to disk and analyzed
+# block by block; it must stay below MAX_UPLOAD_MB, which every upload is checked against first
+app.config['STREAMING_THRESHOLD'] = int(os.environ.get('STREAMING_THRESHOLD_MB', 8)) * 1024 * 1024
+app.config['ANALYSIS_BACKEND'] = os.environ.get('ANALYSIS_BACKEND', 'thread')  # 'thread' or 'process'
+# 'full' analyzes everything at 22050 Hz; 'reduced' runs tempo and key on an 11025 Hz copy
+app.config['ANALYSIS_PROFILE'] = os.environ.get('ANALYSIS_PROFILE', 'full')
+# '1' keeps every spectrogram float32 and skips whole-spectrogram temporaries, lowering peak memory
+app.config['ANALYSIS_FLOAT32'] = os.environ.get('ANALYSIS_FLOAT32', '0') == '1'
+# '1' also drops quiet stretches of 2 s or more inside a track; silent intros and outros are always trimmed
+app.config['TRIM_GAPS'] = os.environ.get('TRIM_GAPS', '0') == '1'
+# '1' traces allocations and logs every analysis's per-stage peaks (slows analyses down)
+app.config['TRACE_ALLOCATIONS'] = os.environ.get('TRACE_ALLOCATIONS', '0') == '1'
+# Trained genre classifier to use instead of the heuristics, e.g. genre_model.joblib (empty: heuristics)
+app.config['GENRE_MODEL_PATH'] = os.environ.get('GENRE_MODEL_PATH', '')
+app.config['ANALYSIS_WORKERS'] = int(os.environ.get('ANALYSIS_WORKERS', os.cpu_count() or 2))
+app.config['RESULT_CACHE_PATH'] = os.environ.get('RESULT_CACHE_PATH', os.path.join('cache', 'results.sqlite3'))  # empty disables
+app.config['RESULT_CACHE_ENTRIES'] = int(os.environ.get('RESULT_CACHE_ENTRIES', 10000))
+app.config['FEATURE_STORE_PATH'] = os.environ.get('FEATURE_STORE_PATH', os.path.join('cache', 'features'))  # empty disables
+app.config['FEATURE_STORE_COMPACT_EVERY'] = int(os.environ.get('FEATURE_STORE_COMPACT_EVERY', 1000))  # pending rows that trigger a compaction
+app.config['FINGERPRINT_INDEX_PATH'] = os.environ.get('FINGERPRINT_INDEX_PATH', os.path.join('cache', 'fingerprints.sqlite3'))  # empty disables
+app.config['JOB_TTL'] = int(os.environ.get('JOB_TTL', 3600))  # seconds a finished job stays pollable
+# Analyses admitted at once, in units of one 16 MB upload or five minutes of audio
+app.config['ADMISSION_MAX_IN_FLIGHT'] = float(os.environ.get('ADMISSION_MAX_IN_FLIGHT', app.config['ANALYSIS_WORKERS']))
+# Analyses allowed to wait for capacity; further uploads get 503 with Retry-After
+app.config['ADMISSION_MAX_QUEUED'] = int(os.environ.get('ADMISSION_MAX_QUEUED', 4 * app.config['ANALYSIS_WORKERS']))
+# Persistent numba JIT cache shared by workers and restarts; set before anything imports librosa
+app.config['NUMBA_CACHE_DIR'] = configure_numba_cache()
+
+# 'debug' logs everything synchronously; 'production' logs through a background queue to a rotated file
+app.config['LOG_MODE'] = os.environ.get('LOG_MODE', 'debug')
+app.config['LOG_FILE'] = os.environ.get('LOG_FILE', 'app.log')
+app.config['LOG_MAX_MB'] = int(os.environ.get('LOG_MAX_MB', 10))
+app.config['LOG_BACKUPS'] = int(os.environ.get('LOG_BACKUPS', 5))
+app.config['LOG_SAMPLE_EVERY'] = int(os.environ.get('LOG_SAMPLE_EVERY', 100))  # production: keep 1 in N per-stage debug lines, 0 drops them
+
+# Configure logging
+configure_logging(
+    app.config['LOG_MODE'],
+    app.config['LOG_FILE'],
+    max_bytes=app.config['LOG_MAX_MB'] * 1024 * 1024,
+    backups=app.config['LOG_BACKUPS'],
+    sample_every=app.config['LOG_SAMPLE_EVERY']
 )
 logger = logging.getLogger(__name__)
-
-# Create upload directory if it doesn't exist
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+if app.config['STREAMING_THRESHOLD'] >= app.config['MAX_FILE_SIZE']:
+    logger.warning("STREAMING_THRESHOLD_MB is not below MAX_UPLOAD_MB, so no upload will be streamed")
 
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {'wav', 'mp3', 'flac', 'm4a', 'ogg'}
@@ -35,20 +84,202 @@ try:
     analyzer = MusicAnalyzer()
     logger.info("Music analyzer initialized successfully")
 except Exception as e:
-    logger.error(f"Failed to initialize music analyzer: {str(e)}")
-    logger.error(f"Full traceback: {traceback.format_exc()}")
+    logger.error("Failed to initialize music analyzer: %s", e)
+    logger.error("Full traceback:", exc_info=True)
     analyzer = None
 
+# Per-feature analysis rates used by every analysis worker
+analysis_rates = RATE_PROFILES[app.config['ANALYSIS_PROFILE']]
+analyzer_options = {'rates': analysis_rates, 'float32': app.config['ANALYSIS_FLOAT32'], 'drop_gaps': app.config['TRIM_GAPS']}
+if app.config['GENRE_MODEL_PATH']:
+    analyzer_options['genre_model_path'] = app.config['GENRE_MODEL_PATH']
+    logger.info("Genre model enabled from %s", app.config['GENRE_MODEL_PATH'])
+if app.config['TRACE_ALLOCATIONS']:
+    # Thread workers share this process's tracing; process workers start their own
+    tracemalloc.start()
+    analyzer_options['audit'] = True
+logger.info("Analysis profile: %s %s%s", app.config['ANALYSIS_PROFILE'], analysis_rates,
+            ' (float32)' if app.config['ANALYSIS_FLOAT32'] else '')
+
+# Result cache shared by this process and the analysis workers
+result_cache = None
+if app.config['RESULT_CACHE_PATH']:
+    analyzer_options.update(
+        cache_path=app.config['RESULT_CACHE_PATH'],
+        cache_entries=app.config['RESULT_CACHE_ENTRIES']
+    )
+    version = analysis_version(analysis_rates, app.config['ANALYSIS_FLOAT32'], app.config['TRIM_GAPS'],
+                               bool(app.config['GENRE_MODEL_PATH']))
+    result_cache = ResultCache(app.config['RESULT_CACHE_PATH'], version, max_entries=app.config['RESULT_CACHE_ENTRIES'])
+    logger.info("Result cache enabled at %s", app.config['RESULT_CACHE_PATH'])
+
+# Columnar store of every extracted feature vector, for offline re-scoring
+feature_store = None
+if app.config['FEATURE_STORE_PATH']:
+    analyzer_options['store_path'] = app.config['FEATURE_STORE_PATH']
+    feature_store = FeatureStore(app.config['FEATURE_STORE_PATH'])
+    logger.info("Feature store enabled at %s", app.config['FEATURE_STORE_PATH'])
+
+# Acoustic fingerprints that let re-encoded copies of analyzed tracks skip the full pipeline
+if app.config['FINGERPRINT_INDEX_PATH']:
+    analyzer_options['fingerprint_path'] = app.config['FINGERPRINT_INDEX_PATH']
+    logger.info("Fingerprint index enabled at %s", app.config['FINGERPRINT_INDEX_PATH'])
+
+# Background analysis workers. Worker processes started with `python app.py` re-import this
+# script as __mp_main__; they must not start workers of their own
+executor = None
+if __name__ != '__mp_main__':
+    executor = create_executor(app.config['ANALYSIS_BACKEND'], app.config['ANALYSIS_WORKERS'], analyzer_options)
+# Weighted admission in front of the workers, so bursts queue up (boundedly) instead of exhausting memory
+admission = AdmissionController(executor, app.config['ADMISSION_MAX_IN_FLIGHT'], app.config['ADMISSION_MAX_QUEUED'])
+# Stage timings of finished analyses, served on /metrics
+metrics = AnalysisMetrics()
+# Held while the feature store is being compacted, so only one compaction runs at a time
+store_compaction = threading.Lock()
+
+def compact_store():
+    """Fold the workers' pending feature rows into the store's columns, in the background"""
+    if not store_compaction.acquire(blocking=False):
+        return
+    def run():
+        try:
+            feature_store.compact()
+        except Exception as e:
+            logger.warning("Feature store compaction failed: %s", e, exc_info=True)
+        finally:
+            store_compaction.release()
+    threading.Thread(target=run, name='store-compaction', daemon=True).start()
+
+def job_finished(result):
+    metrics.observe(result)
+    # Workers only add pending rows; compact before they pile up
+    if feature_store is not None and feature_store.pending_count() >= app.config['FEATURE_STORE_COMPACT_EVERY']:
+        compact_store()
+
+def job_failed(error_msg):
+    # Logged once, when the job fails; polling it only serializes the error
+    payload = error_payload(error_msg)
+    if 'solution' in payload:
+        logger.error("%s %s", payload['error'], payload['solution'])
+
+jobs = JobQueue(executor, ttl=app.config['JOB_TTL'], on_result=job_finished, admission=admission, on_error=job_failed)
+logger.info("Analysis backend: %s with %s workers", app.config['ANALYSIS_BACKEND'], app.config['ANALYSIS_WORKERS'])
+
 @app.route('/')
 def index():
     logger.info("Index page requested")
     try:
         return render_template('index.html')
     except Exception as e:
-        logger.error(f"Error rendering index page: {str(e)}")
-        logger.error(f"Full traceback: {traceback.format_exc()}")
+        logger.error("Error rendering index page: %s", e)
+        logger.error("Full traceback:", exc_info=True)
         return f"Error loading page: {str(e)}", 500
 
+def error_payload(error_msg):
+    """Build the error response body for a failed analysis
+
+    Only serializes: the job queue logs each failure once, when it happens,
+    however often the job is polled.
+    """
+    # Provide specific error messages for common issues
+    if "Could not find/load shared object file" in error_msg or "ffmpeg" in error_msg.lower():
+        return {
+            'error': 'Audio processing error: ffmpeg is required to handle MP3 files. Please install ffmpeg and try again.',
+            'solution': 'Install ffmpeg using: conda install -c conda-forge ffmpeg',
+            'detailed_error': error_msg
+        }
+    elif "DLL initialization routine failed" in error_msg or "llvmlite" in error_msg:
+        return {
+            'error': 'Audio library initialization error. This is a Windows compatibility issue.',
+            'solution': 'Reinstall compatible versions: pip uninstall llvmlite numba librosa -y && pip install librosa==0.10.1 numba==0.58.1 llvmlite==0.41.1',
+            'detailed_error': error_msg
+        }
+    else:
+        return {
+            'error': f'Analysis failed: {error_msg}',
+            'detailed_error': error_msg
+        }
+
+@app.errorhandler(Overloaded)
+def overloaded(error):
+    """503 with Retry-After when the analysis wait queue is full"""
+    response = jsonify({
+        'error': 'The server is busy analyzing other files. Please try again shortly.',
+        'retry_after': error.retry_after
+    })
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
+
+@app.errorhandler(TooLarge)
+def too_large(error):
+    """413 for a batch that exceeds the admission limits even on an idle server"""
+    return jsonify({
+        'error': f'{error} Please split the batch into smaller requests.'
+    }), 413
+
+def upload_weight(data, filename, fast=False):
+    """Admission weight of in-memory audio, from its size and (header) duration"""
+    duration = None
+    # Only in-process decoders read headers cheaply; the fallback would spawn ffmpeg
+    if decoders_for(filename):
+        try:
+            duration = source_duration(data, filename)
+        except Exception as e:
+            logger.debug("Could not read the duration of %s: %s", filename, e)
+    if fast and duration is not None:
+        # Previews only decode their excerpts
+        duration = min(duration, EXCERPT_COUNT * EXCERPT_DURATION)
+    return analysis_weight(len(data), duration)
+
+def cached_response(content_hash, filename, variant=None):
+    """Response for an upload whose results are already cached, or None"""
+    if result_cache is None:
+        return None
+    cached = result_cache.get(content_hash, variant=variant)
+    if cached is None:
+        return None
+    logger.info("Cache hit for %s, returning stored results", filename)
+    return jsonify({
+        'success': True,
+        'results': summarize(cached)
+    })
+
+def file_too_large(filename):
+    limit_mb = app.config['MAX_FILE_SIZE'] // (1024 * 1024)
+    logger.warning("Upload over the %sMB limit: %s", limit_mb, filename)
+    return jsonify({'error': f'{filename} is too large. Please upload files smaller than {limit_mb}MB.'}), 413
+
+def queued_response(job_id):
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status_url': url_for('job_status', job_id=job_id)
+    }), 202
+
+def queue_streaming_analysis(file, filename):
+    """Spool a large upload to a temporary file and queue a streaming analysis of it"""
+    fd, filepath = tempfile.mkstemp(suffix=f".{extension(filename)}")
+    os.close(fd)
+    logger.info("Large upload, spooling to: %s", filepath)
+    try:
+        file.save(filepath)
+        cached = cached_response(hash_file(filepath), filename)
+    except Exception:
+        os.remove(filepath)
+        raise
+    if cached is not None:
+        os.remove(filepath)
+        return cached
+    
+    # The worker removes the file once the analysis is done; streaming memory use is
+    # flat whatever the length, so it counts as one unit of weight
+    try:
+        job_id = jobs.submit(analyze_file, filepath, True, True, filename=filename)
+    except Overloaded:
+        os.remove(filepath)
+        raise
+    return queued_response(job_id)
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     logger.info("File upload request received")
@@ -58,12 +289,20 @@ def upload_file():
         logger.error("Music analyzer not initialized - cannot process uploads")
         return jsonify({'error': 'Music analyzer not available. Check server logs for details.'}), 500
     
+    # Turn requests away before reading their body when even the smallest job would not fit
+    if not admission.has_room():
+        raise Overloaded(admission.retry_after())
+    
+    # A single file, so the per-file limit applies to the whole request, checked before parsing it
+    if request.content_length and request.content_length > app.config['MAX_FILE_SIZE']:
+        return file_too_large('The file')
+    
     if 'file' not in request.files:
         logger.warning("Upload request missing file")
         return jsonify({'error': 'No file uploaded'}), 400
     
     file = request.files['file']
-    logger.info(f"File received: {file.filename}")
+    logger.info("File received: %s", file.filename)
     
     if file.filename == '':
         logger.warning("Upload request with empty filename")
@@ -71,75 +310,125 @@ def upload_file():
     
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        logger.info(f"Saving file to: {filepath}")
         
-        try:
-            file.save(filepath)
-            logger.info(f"File saved successfully: {filepath}")
-            
-            # Analyze the uploaded file
-            logger.info(f"Starting analysis of: {filepath}")
-            results = analyzer.analyze_song(filepath)
-            logger.info(f"Analysis completed. Results: {results}")
-            
-            if results:
-                # Clean up uploaded file
-                logger.info(f"Cleaning up file: {filepath}")
-                os.remove(filepath)
-                
-                logger.info("Analysis successful, returning results")
-                return jsonify({
-                    'success': True,
-                    'results': {
-                        'key': results['key'],
-                        'bpm': results['bpm'],
-                        'genre': results['genre']
-                    }
-                })
-            else:
-                logger.error("Analysis returned no results")
-                if os.path.exists(filepath):
-                    os.remove(filepath)
-                return jsonify({'error': 'Failed to analyze audio file'}), 500
-                
-        except Exception as e:
-            # Log detailed error information
-            logger.error(f"Exception during file analysis: {str(e)}")
-            logger.error(f"Exception type: {type(e).__name__}")
-            logger.error(f"Full traceback: {traceback.format_exc()}")
-            
-            # Clean up uploaded file
-            if os.path.exists(filepath):
-                logger.info(f"Cleaning up file after error: {filepath}")
-                os.remove(filepath)
-            
-            error_msg = str(e)
-            # Provide specific error messages for common issues
-            if "Could not find/load shared object file" in error_msg or "ffmpeg" in error_msg.lower():
-                logger.error("FFmpeg not found - this is the likely cause of the error")
-                return jsonify({
-                    'error': 'Audio processing error: ffmpeg is required to handle MP3 files. Please install ffmpeg and try again.',
-                    'solution': 'Install ffmpeg using: conda install -c conda-forge ffmpeg',
-                    'detailed_error': error_msg
-                }), 500
-            elif "DLL initialization routine failed" in error_msg or "llvmlite" in error_msg:
-                logger.error("DLL initialization error - librosa dependency issue")
-                return jsonify({
-                    'error': 'Audio library initialization error. This is a Windows compatibility issue.',
-                    'solution': 'Reinstall compatible versions: pip uninstall llvmlite numba librosa -y && pip install librosa==0.10.1 numba==0.58.1 llvmlite==0.41.1',
-                    'detailed_error': error_msg
-                }), 500
-            else:
-                logger.error(f"General analysis error: {error_msg}")
-                return jsonify({
-                    'error': f'Analysis failed: {error_msg}',
-                    'detailed_error': error_msg
-                }), 500
-    
-    logger.warning(f"Invalid file type uploaded: {file.filename}")
+        # Quick preview from a few excerpts instead of the whole track
+        fast = request.form.get('mode', request.args.get('mode')) == FAST_VARIANT
+        # Windowed key/tempo curves for modulation and tempo-change detection
+        segments = not fast and request.form.get('segments', request.args.get('segments')) in ('1', 'true')
+        
+        # Long recordings are streamed from a temporary file in constant memory
+        if (not fast and not segments and extension(filename) in soundfile_formats()
+                and request.content_length and request.content_length > app.config['STREAMING_THRESHOLD']):
+            return queue_streaming_analysis(file, filename)
+        
+        # Keep the upload in memory; it is decoded without a round trip through disk
+        data = file.read()
+        logger.info("Read %s bytes from upload: %s", len(data), filename)
+        
+        # Repeated uploads are answered straight from the result cache
+        variant = FAST_VARIANT if fast else SEGMENTS_VARIANT if segments else None
+        cached = cached_response(hash_bytes(data), filename, variant)
+        if cached is not None:
+            return cached
+        
+        # Analysis runs on the job queue; the client polls /jobs/<id>
+        job_id = jobs.submit(analyze_data, data, filename, fast, segments, filename=filename,
+                             weight=upload_weight(data, filename, fast))
+        return queued_response(job_id)
+    
+    logger.warning("Invalid file type uploaded: %s", file.filename)
     return jsonify({'error': 'Invalid file type. Please upload WAV, MP3, FLAC, M4A, or OGG files.'}), 400
 
+@app.route('/batch', methods=['POST'])
+def batch_upload():
+    """Queue an analysis job for each uploaded file; the client polls /jobs/<id> for each"""
+    logger.info("Batch upload request received")
+    
+    if analyzer is None:
+        logger.error("Music analyzer not initialized - cannot process uploads")
+        return jsonify({'error': 'Music analyzer not available. Check server logs for details.'}), 500
+    
+    # As for /upload, turn requests away before their bodies are parsed or read
+    if not admission.has_room():
+        raise Overloaded(admission.retry_after())
+    
+    if request.content_length and request.content_length > app.config['MAX_BATCH_SIZE']:
+        limit_mb = app.config['MAX_BATCH_SIZE'] // (1024 * 1024)
+        logger.warning("Batch request of %s bytes is over the %sMB limit", request.content_length, limit_mb)
+        return jsonify({'error': f'The batch is too large. Please upload at most {limit_mb}MB per batch.'}), 413
+    
+    uploads = [file for file in request.files.getlist('files') if file.filename]
+    if not uploads:
+        logger.warning("Batch request without files")
+        return jsonify({'error': 'No files uploaded'}), 400
+    
+    if len(uploads) > app.config['MAX_BATCH_FILES']:
+        logger.warning("Batch of %s files is over the limit of %s", len(uploads), app.config['MAX_BATCH_FILES'])
+        return jsonify({'error': f"Too many files. Please upload at most {app.config['MAX_BATCH_FILES']} files per batch."}), 413
+    
+    invalid = [file.filename for file in uploads if not allowed_file(file.filename)]
+    if invalid:
+        logger.warning("Invalid file types in batch: %s", invalid)
+        return jsonify({'error': f"Invalid file type: {', '.join(invalid)}. Please upload WAV, MP3, FLAC, M4A, or OGG files."}), 400
+    
+    items = []
+    for file in uploads:
+        # One byte past the limit is enough to tell the file is too large
+        data = file.read(app.config['MAX_FILE_SIZE'] + 1)
+        if len(data) > app.config['MAX_FILE_SIZE']:
+            return file_too_large(file.filename)
+        items.append((secure_filename(file.filename), data))
+    
+    # The whole batch is admitted (or rejected with 503) before anything is analyzed
+    job_ids = jobs.submit_many([(analyze_data, (data, filename), filename, upload_weight(data, filename))
+                                for filename, data in items])
+    logger.info("Batch of %s files queued", len(items))
+    return jsonify({
+        'success': True,
+        'jobs': [{'filename': filename, 'job_id': job_id, 'status_url': url_for('job_status', job_id=job_id)}
+                 for (filename, _), job_id in zip(items, job_ids)]
+    }), 202
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        logger.warning("Status requested for unknown job: %s", job_id)
+        return jsonify({'error': 'Unknown or expired job id'}), 404
+    
+    data = job.to_dict()
+    if job.status == FINISHED:
+        data['success'] = True
+    elif job.status == FAILED:
+        data.update(error_payload(job.error))
+        data['success'] = False
+    return jsonify(data)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text exposition of per-stage analysis times, queue depth, in-flight jobs and admission"""
+    in_flight = jobs.in_flight()
+    admitted_weight, _, waiting, rejected = admission.stats()
+    text = metrics.render(gauges={
+        'analysis_queue_depth': ('Upload jobs waiting for a worker', max(0, jobs.depth() - in_flight)),
+        'analysis_in_flight': ('Upload jobs currently being analyzed', in_flight),
+        'analysis_admitted_weight': ('Weight of the analyses admitted to the workers', admitted_weight),
+        'analysis_admission_waiting': ('Analyses waiting for admission, uploads and batch files', waiting),
+    }, counters={
+        'analysis_admission_rejected_total': ('Requests rejected with 503 since startup', rejected),
+    })
+    return Response(text, mimetype='text/plain; version=0.0.4')
+
+@app.route('/healthz')
+def healthz():
+    """Readiness probe: 200 once the analysis workers have imported librosa and warmed up"""
+    status = warmup_status()
+    return jsonify({
+        'status': status,
+        'backend': app.config['ANALYSIS_BACKEND'],
+        'workers': app.config['ANALYSIS_WORKERS']
+    }), 200 if status == 'ready' else 503
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port)
@@ -0,0 +1,3 @@
+from .analyzer import ANALYZER_VERSION, EXCERPT_VARIANT, FAST_VARIANT, SEGMENTS_VARIANT, MusicAnalyzer, analysis_version
+
+__all__ = ['ANALYZER_VERSION', 'EXCERPT_VARIANT', 'FAST_VARIANT', 'SEGMENTS_VARIANT', 'MusicAnalyzer', 'analysis_version']
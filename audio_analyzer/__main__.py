@@ -0,0 +1,86 @@
+import argparse
+import json
+import logging
+import sys
+import tracemalloc
+
+from .analyzer import MusicAnalyzer, analysis_version
+from .batch import scan
+from .features import RATE_PROFILES
+from .fingerprint import FingerprintIndex
+from .genre import MODEL_PATH, GenreModel
+from .logs import LOG_FORMAT
+from .store import FeatureStore, rescore
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m audio_analyzer', description='Music key, BPM and genre analyzer')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    scan_parser = commands.add_parser('scan', help='Analyze every audio file in a directory tree')
+    scan_parser.add_argument('directory', help='Directory to scan recursively')
+    scan_parser.add_argument('-o', '--output', default='scan_results.jsonl',
+                             help='Results file; .csv writes CSV, anything else JSON lines (default: %(default)s)')
+    scan_parser.add_argument('-w', '--workers', type=int, default=None,
+                             help='Worker processes (default: CPU count)')
+    scan_parser.add_argument('--profile', choices=sorted(RATE_PROFILES), default='full',
+                             help='Analysis rate profile (default: %(default)s)')
+    scan_parser.add_argument('--float32', action='store_true',
+                             help='Keep every spectrogram float32 to lower peak memory per analysis')
+    scan_parser.add_argument('--audit', action='store_true',
+                             help='Log each analysis\'s per-stage allocation peaks (traced with tracemalloc, slower)')
+    scan_parser.add_argument('--drop-gaps', action='store_true',
+                             help='Also cut quiet stretches of 2 s or more out of each track before analysis')
+    scan_parser.add_argument('--genre-model', nargs='?', const=MODEL_PATH, default=None,
+                             help='Predict genres with a trained model (default file: the shipped genre_model.joblib, '
+                                  'experimental) instead of the heuristics')
+    scan_parser.add_argument('--store', default=None,
+                             help='Feature store directory to record extracted features in')
+    scan_parser.add_argument('--fingerprints', default=None,
+                             help='Fingerprint index (SQLite file) used to skip re-encoded duplicates')
+    scan_parser.add_argument('--batch-size', type=int, default=None,
+                             help='Analyze this many files at a time from a 30 s excerpt each, '
+                                  'stacked into one array (default: full analysis per file)')
+
+    store_parser = commands.add_parser('store', help='Maintain or re-score a feature store')
+    store_parser.add_argument('action', choices=['compact', 'rescore'],
+                              help='compact folds pending rows into the columns; rescore re-derives key and genre')
+    store_parser.add_argument('path', help='Feature store directory')
+    store_parser.add_argument('--genre-model', nargs='?', const=MODEL_PATH, default=None,
+                              help='Re-score genres with a trained model instead of the heuristics (experimental)')
+    store_parser.add_argument('-o', '--output', default='rescored.jsonl',
+                              help='JSON lines output of rescore (default: %(default)s)')
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+
+    if args.command == 'scan':
+        if args.audit:
+            tracemalloc.start()
+        rates = RATE_PROFILES[args.profile]
+        store = FeatureStore(args.store) if args.store else None
+        version = analysis_version(rates, args.float32, args.drop_gaps, args.genre_model is not None)
+        fingerprints = FingerprintIndex(args.fingerprints, version) if args.fingerprints else None
+        analyzer = MusicAnalyzer(rates=rates, store=store, fingerprints=fingerprints, genre_model=GenreModel(args.genre_model),
+                                 float32=args.float32, drop_gaps=args.drop_gaps)
+        count = scan(analyzer, args.directory, args.output, workers=args.workers, batch_size=args.batch_size)
+        print(f"Analyzed {count} files, results in {args.output}")
+        if store is not None:
+            store.compact()
+    elif args.command == 'store':
+        store = FeatureStore(args.path)
+        added = store.compact()
+        if args.action == 'compact':
+            print(f"Compacted {added} pending rows, {len(store.hashes())} tracks stored")
+        else:
+            count = 0
+            with open(args.output, 'w', encoding='utf-8') as f:
+                for content_hash, key, genre in rescore(store, MusicAnalyzer(genre_model=GenreModel(args.genre_model))):
+                    f.write(json.dumps({'hash': content_hash, 'key': key, 'genre': genre}) + '\n')
+                    count += 1
+            print(f"Re-scored {count} tracks, results in {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,628 @@
+import io
+import numpy as np
+import os
+import logging
+import time
+import tracemalloc
+
+from . import key
+from .cache import hash_bytes, hash_file
+from .decoders import DEFAULT_SR, decode, source_duration, temporary_path
+from .features import FULL_RATES, engines_for_rates, rates_tag
+from .fingerprint import track_fingerprint
+from .genre import GenreModel
+from .lazy import soundfile as sf
+from .metrics import StageTimer
+from .multitrack import load_stack, masked_stats
+from .preview import combine_excerpts, load_excerpts
+from .segments import track_segments
+from .streaming import accumulate_stream
+from .tempo import TempoEstimator, fold_octave
+from .trim import trim_silence
+
+# Bump whenever a change alters analysis results, so cached results are not reused
+ANALYZER_VERSION = '7'
+
+# Result mode (and cache variant) of excerpt-based preview analyses
+FAST_VARIANT = 'fast'
+# Cache variant of analyses that include key/tempo segments
+SEGMENTS_VARIANT = 'segments'
+# Result mode (and cache variant) of batched analyses of one centered excerpt per track
+EXCERPT_VARIANT = 'excerpt'
+
+def analysis_version(rates=None, float32=False, drop_gaps=False, genre_model=False):
+    """Version tag for cached results produced with the given analysis rates, precision, trimming and genre source"""
+    version = ANALYZER_VERSION
+    if rates is not None and rates != FULL_RATES:
+        version += f"+{rates_tag(rates)}"
+    if float32:
+        version += '+float32'
+    if drop_gaps:
+        version += '+gaps'
+    if genre_model:
+        version += '+model'
+    return version
+
+class MusicAnalyzer:
+    def __init__(self, cache=None, rates=None, store=None, genre_model=None, fingerprints=None, float32=False, drop_gaps=False):
+        # Set up logging for this class
+        self.logger = logging.getLogger(__name__)
+        self.logger.info("Initializing MusicAnalyzer")
+        # Optional ResultCache consulted by analyze_song
+        self.cache = cache
+        # Optional FeatureStore that analyze_song records extracted features in
+        self.store = store
+        # Optional FingerprintIndex used to recognise re-encoded copies of analyzed tracks
+        self.fingerprints = fingerprints
+        # Opt-in trained genre classifier, loaded on its first prediction; without one genres come from heuristics
+        self.genre_model = genre_model if genre_model is not None else GenreModel(path=None)
+        # Analysis rate per feature group (see features.RATE_PROFILES)
+        self.rates = dict(rates or FULL_RATES)
+        # Keep every spectrogram float32 and avoid whole-spectrogram temporaries (see FeatureEngine)
+        self.float32 = float32
+        # Also cut long quiet stretches out of the middle of a track, not just its silent edges
+        self.drop_gaps = drop_gaps
+    
+    def worker_options(self):
+        """Picklable options that rebuild this analyzer's configuration in a worker process"""
+        options = {'rates': self.rates}
+        if self.float32:
+            options['float32'] = True
+        if self.drop_gaps:
+            options['drop_gaps'] = True
+        if self.cache is not None:
+            options['cache_path'] = self.cache.path
+            options['cache_entries'] = self.cache.max_entries
+        if self.store is not None:
+            options['store_path'] = self.store.root
+        if self.fingerprints is not None:
+            options['fingerprint_path'] = self.fingerprints.path
+        if self.genre_model.path is not None:
+            options['genre_model_path'] = self.genre_model.path
+        if tracemalloc.is_tracing():
+            # Workers audit allocations when this process does
+            options['audit'] = True
+        return options
+    
+    def warmup(self, duration=5.0, genre_model=False):
+        """Run every analysis path once on a synthetic signal; returns the seconds taken
+        
+        The first call of each of librosa's numba functions compiles it (or
+        loads it from NUMBA_CACHE_DIR), so warming a worker before it serves
+        keeps that cost off the first request. The in-memory, preview,
+        streaming and segment paths all run. Loading the genre model (and with
+        it scikit-learn) is optional.
+        """
+        self.logger.info("Warming up analyzer on a %.1fs synthetic signal", duration)
+        start = time.perf_counter()
+        
+        t = np.arange(int(DEFAULT_SR * duration)) / DEFAULT_SR
+        y = 0.5 * np.sin(2 * np.pi * 440.0 * t).astype(np.float32)
+        # Clicks at 120 BPM so the tempo path sees real onsets
+        y[::DEFAULT_SR // 2] += 1.0
+        buffer = io.BytesIO()
+        sf.write(buffer, y, DEFAULT_SR, format='WAV')
+        data = buffer.getvalue()
+        
+        with temporary_path(data, 'warmup.wav') as path:
+            runs = [
+                self.extract_features('warmup.wav', data=data, segments=True),
+                self.extract_features('warmup.wav', data=data, fast=True),
+                self.extract_features(path, streaming=True),
+            ]
+        if any(features is None for features in runs):
+            raise RuntimeError('Warmup analysis failed')
+        
+        for features in runs:
+            if genre_model:
+                self.predict_genre(features)
+            else:
+                self.heuristic_genre(features)
+        
+        elapsed = time.perf_counter() - start
+        self.logger.info("Warmup finished in %.2fs", elapsed)
+        return elapsed
+    
+    def extract_features(self, audio_path, data=None, streaming=False, fast=False, segments=False, timer=None):
+        """Extract audio features for analysis
+        
+        If data (the file's bytes) is given it is decoded in memory and
+        audio_path only names the source; nothing is read from disk. With
+        streaming=True the file is analyzed block by block in constant memory.
+        With fast=True only a few short excerpts are decoded and analyzed.
+        With segments=True windowed key and tempo curves are added (full
+        analysis only). A full analysis first trims silent edges (and long
+        quiet gaps if drop_gaps is set, except with segments) and reports the
+        seconds removed as features['trimmed']. Time spent per stage is added
+        to timer (a StageTimer).
+        """
+        self.logger.info("Starting feature extraction for: %s", audio_path)
+        timer = timer or StageTimer()
+        
+        if segments and (fast or streaming):
+            self.logger.warning("Segment analysis needs the whole decoded track; skipping segments")
+        
+        try:
+            if fast:
+                features = self.preview_features(audio_path, data, timer)
+                self.logger.info("Feature extraction completed successfully")
+                return features
+            
+            if streaming:
+                features = self.stream_features(audio_path, timer)
+                self.logger.info("Feature extraction completed successfully")
+                return features
+            
+            if data is not None:
+                # Decode the uploaded bytes without touching the disk
+                self.logger.info("Decoding %s bytes in memory...", len(data))
+                with timer.stage('decode'):
+                    y, sr, decoder = decode(data, audio_path)
+            else:
+                # Check if file exists
+                if not os.path.exists(audio_path):
+                    self.logger.error("Audio file not found: %s", audio_path)
+                    return None
+                
+                # Log file info
+                file_size = os.path.getsize(audio_path)
+                self.logger.info("File size: %s bytes", file_size)
+                
+                # Load audio file
+                self.logger.info("Loading audio file...")
+                with timer.stage('decode'):
+                    y, sr, decoder = decode(audio_path, audio_path)
+            self.logger.info("Audio loaded successfully with %s. Sample rate: %s, Duration: %.2fs", decoder, sr, len(y)/sr)
+            
+            # Segment curves need one continuous timeline, so only their lead-in and tail are cut
+            with timer.stage('trim'):
+                y, spans, trimmed = trim_silence(y, sr, drop_gaps=self.drop_gaps and not segments)
+            if trimmed:
+                self.logger.info("Trimmed %.2fs of silence, analyzing %.2fs in %s span(s)", trimmed, len(y)/sr, len(spans))
+            
+            features = self.compute_features(y, sr, segments, timer, offset=spans[0][0] / sr)
+            features['decoder'] = decoder
+            features['trimmed'] = round(trimmed, 2)
+            
+            self.logger.info("Feature extraction completed successfully")
+            return features
+            
+        except Exception as e:
+            error_msg = str(e)
+            self.logger.error("Error extracting features: %s", error_msg)
+            self.logger.error("Exception type: %s", type(e).__name__)
+            self.logger.error("Full traceback:", exc_info=True)
+            
+            # Provide specific error messages for common issues
+            if "Could not find/load shared object file" in error_msg or "ffmpeg" in error_msg.lower():
+                self.logger.error("FFmpeg dependency missing!")
+                self.logger.error("SOLUTION: Install ffmpeg to handle MP3 files:")
+                self.logger.error("  Option 1: conda install -c conda-forge ffmpeg")
+                self.logger.error("  Option 2: pip install ffmpeg-python")
+                self.logger.error("  Option 3: Download ffmpeg from https://ffmpeg.org/")
+            elif "DLL initialization routine failed" in error_msg or "llvmlite" in error_msg:
+                self.logger.error("DLL initialization error with librosa dependencies!")
+                self.logger.error("SOLUTION: Reinstall with compatible versions:")
+                self.logger.error("  pip uninstall llvmlite numba librosa -y")
+                self.logger.error("  pip install librosa==0.10.1 numba==0.58.1 llvmlite==0.41.1")
+            
+            return None
+    
+    def estimate_bpm(self, tempo_estimator):
+        """Estimate BPM from a TempoEstimator's onset envelope and tempogram"""
+        # One onset envelope and tempogram feed both estimates
+        tempo = tempo_estimator.primary()
+        # Add secondary BPM estimation for better accuracy, in the primary's octave:
+        # averaging 140 with its half-time 70 would give a tempo neither found
+        tempo_alt = fold_octave(tempo_estimator.secondary(), tempo)
+        # Use the average if they differ significantly, else use primary
+        if abs(tempo - tempo_alt) > 20:
+            bpm = float((tempo + tempo_alt) / 2)
+            self.logger.debug("BPM extracted (averaged): %s (primary: %s, alt: %s)", bpm, tempo, tempo_alt)
+        else:
+            bpm = float(tempo)
+            self.logger.debug("BPM extracted: %s", bpm)
+        return bpm
+    
+    def estimate_key(self, chroma_mean):
+        """Estimate the key (major or minor) from a mean chroma vector"""
+        best_key = key.estimate_key(chroma_mean)
+        self.logger.debug("Key detected: %s", best_key)
+        return best_key
+    
+    def preview_features(self, audio_path, data=None, timer=None):
+        """Estimate audio features from a few short excerpts, with a confidence value"""
+        timer = timer or StageTimer()
+        self.logger.info("Decoding preview excerpts from: %s", audio_path)
+        with timer.stage('decode'):
+            excerpts, duration, decoder = load_excerpts(audio_path, data)
+        self.logger.info("Decoded %s excerpts from a %.2fs track with %s", len(excerpts), duration, decoder)
+        
+        features = combine_excerpts([self.compute_features(y, DEFAULT_SR, timer=timer) for y in excerpts])
+        features['decoder'] = decoder
+        self.logger.info("Preview estimate: Key=%s, BPM=%s, Confidence=%s", features['key'], features['bpm'], features['confidence'])
+        return features
+    
+    def stream_features(self, audio_path, timer=None):
+        """Extract audio features from a file block by block with running statistics"""
+        timer = timer or StageTimer()
+        self.logger.info("Streaming audio blocks from: %s", audio_path)
+        # Decoding and per-frame features are interleaved block by block
+        with timer.stage('stream'):
+            stream = accumulate_stream(audio_path)
+        self.logger.info("Audio streamed successfully. Sample rate: %s, Frames: %s", stream.sr, stream.mfcc.count)
+        
+        features = {}
+        with timer.stage('tempo'):
+            features['bpm'] = self.estimate_bpm(TempoEstimator(stream.onset_envelope(), stream.sr, stream.hop_length))
+        with timer.stage('key'):
+            features['key'] = self.estimate_key(stream.chroma.mean)
+        features['chroma_mean'] = stream.chroma.mean.tolist()
+        features['mfcc_mean'] = stream.mfcc.mean.tolist()
+        features['mfcc_std'] = stream.mfcc.std.tolist()
+        features['spectral_centroid_mean'] = float(stream.centroid.mean[0])
+        features['spectral_centroid_std'] = float(stream.centroid.std[0])
+        features['zcr_mean'] = float(stream.zcr.mean[0])
+        features['zcr_std'] = float(stream.zcr.std[0])
+        features['rolloff_mean'] = float(stream.rolloff.mean[0])
+        features['rolloff_std'] = float(stream.rolloff.std[0])
+        # Blocks are read through soundfile
+        features['decoder'] = 'soundfile'
+        return features
+    
+    def compute_features(self, y, sr, segments=False, timer=None, offset=0.0):
+        """Extract audio features from an already-decoded signal
+        
+        With segments=True, windowed key and tempo curves are added under
+        features['segments'], with times shifted by offset seconds (where y
+        starts in the track). Stage times are added to timer if given.
+        """
+        timer = timer or StageTimer()
+        # Extract features
+        features = {}
+        
+        # One STFT and mel spectrogram per analysis rate, shared by the features below
+        self.logger.debug("Computing spectrograms...")
+        with timer.stage('spectrogram'):
+            engines = engines_for_rates(y, sr, self.rates, self.float32)
+        engine = engines['spectral']
+        
+        # BPM (Beats Per Minute)
+        self.logger.debug("Extracting BPM...")
+        with timer.stage('tempo'):
+            tempo_engine = engines['tempo']
+            tempo_estimator = TempoEstimator(tempo_engine.onset_strength(), tempo_engine.sr, tempo_engine.hop_length)
+            features['bpm'] = self.estimate_bpm(tempo_estimator)
+        
+        # Key detection using chroma features
+        self.logger.debug("Extracting key using chroma features...")
+        with timer.stage('key'):
+            chroma_engine = engines['chroma']
+            chroma = chroma_engine.chroma()
+            chroma_mean = np.mean(chroma, axis=1)
+            features['key'] = self.estimate_key(chroma_mean)
+            # Kept so keys can be re-scored later without decoding the audio again
+            features['chroma_mean'] = chroma_mean.tolist()
+        
+        if segments:
+            # Windowed curves reuse the chromagram and tempogram computed above
+            self.logger.debug("Extracting key and tempo segments...")
+            with timer.stage('segments'):
+                features['segments'] = track_segments(chroma, chroma_engine.sr, chroma_engine.hop_length, tempo_estimator, offset=offset)
+            self.logger.debug("Segments extracted: %s key changes, %s tempo changes", len(features['segments']['key_changes']), len(features['segments']['tempo_changes']))
+        
+        # Additional features for genre classification
+        self.logger.debug("Extracting MFCC features...")
+        with timer.stage('mfcc'):
+            mfcc = engine.mfcc()
+            features['mfcc_mean'] = np.mean(mfcc, axis=1).tolist()
+            features['mfcc_std'] = np.std(mfcc, axis=1).tolist()
+        
+        # Spectral features
+        self.logger.debug("Extracting spectral features...")
+        with timer.stage('spectral'):
+            spectral_centroids = engine.spectral_centroid()
+            features['spectral_centroid_mean'] = float(np.mean(spectral_centroids))
+            features['spectral_centroid_std'] = float(np.std(spectral_centroids))
+        
+        # Zero crossing rate
+        self.logger.debug("Extracting zero crossing rate...")
+        with timer.stage('zcr'):
+            zcr = engine.zero_crossing_rate()
+            features['zcr_mean'] = float(np.mean(zcr))
+            features['zcr_std'] = float(np.std(zcr))
+        
+        # Spectral rolloff
+        self.logger.debug("Extracting spectral rolloff...")
+        with timer.stage('rolloff'):
+            rolloff = engine.spectral_rolloff()
+            features['rolloff_mean'] = float(np.mean(rolloff))
+            features['rolloff_std'] = float(np.std(rolloff))
+        
+        return features
+    
+    def compute_stack_features(self, stack, lengths, sr, timer=None):
+        """Extract features for every track of a zero-padded (n_tracks, samples) stack
+        
+        The STFT, mel, MFCC, onset, chroma and spectral computations each run
+        once over the whole stack (only tuning is estimated track by track);
+        per-track statistics are then reduced over each track's own frames,
+        and keys are scored with one matrix product.
+        Returns one features dict per row, None for rows of length 0.
+        """
+        timer = timer or StageTimer()
+        tracks = [i for i, length in enumerate(lengths) if length]
+        if not tracks:
+            return [None] * len(lengths)
+        
+        self.logger.debug("Computing spectrograms for %s stacked tracks...", len(lengths))
+        with timer.stage('spectrogram'):
+            engines = engines_for_rates(stack, sr, self.rates, self.float32)
+        engine, tempo_engine, chroma_engine = engines['spectral'], engines['tempo'], engines['chroma']
+        frames = engine.frame_counts(lengths, sr)
+        features = [{} if i in tracks else None for i in range(len(lengths))]
+        
+        with timer.stage('tempo'):
+            onset = tempo_engine.onset_strength()
+            tempo_frames = tempo_engine.frame_counts(lengths, sr)
+            for i in tracks:
+                estimator = TempoEstimator(onset[i, :tempo_frames[i]], tempo_engine.sr, tempo_engine.hop_length)
+                features[i]['bpm'] = self.estimate_bpm(estimator)
+        
+        with timer.stage('key'):
+            chroma_frames = chroma_engine.frame_counts(lengths, sr)
+            chroma_means = chroma_engine.stack_chroma_means(chroma_frames)[tracks]
+            for i, best_key, chroma_mean in zip(tracks, key.estimate_keys(chroma_means), chroma_means):
+                features[i]['key'] = best_key
+                features[i]['chroma_mean'] = chroma_mean.tolist()
+        
+        with timer.stage('mfcc'):
+            mfcc_mean, mfcc_std = masked_stats(engine.mfcc(), frames)
+        with timer.stage('spectral'):
+            centroid_mean, centroid_std = masked_stats(engine.spectral_centroid(), frames)
+        with timer.stage('zcr'):
+            zcr_mean, zcr_std = masked_stats(engine.zero_crossing_rate(), frames)
+        with timer.stage('rolloff'):
+            rolloff_mean, rolloff_std = masked_stats(engine.spectral_rolloff(), frames)
+        
+        for i in tracks:
+            features[i].update(
+                mfcc_mean=mfcc_mean[i].tolist(),
+                mfcc_std=mfcc_std[i].tolist(),
+                spectral_centroid_mean=float(centroid_mean[i, 0]),
+                spectral_centroid_std=float(centroid_std[i, 0]),
+                zcr_mean=float(zcr_mean[i, 0]),
+                zcr_std=float(zcr_std[i, 0]),
+                rolloff_mean=float(rolloff_mean[i, 0]),
+                rolloff_std=float(rolloff_std[i, 0]),
+            )
+        return features
+    
+    def predict_genre(self, features):
+        """Predict genre with the trained model, falling back to heuristics"""
+        return self.predict_genres([features])[0]
+    
+    def predict_genres(self, features_list):
+        """Predict genres for many tracks with one batched model call"""
+        try:
+            genres = self.genre_model.predict(features_list)
+        except Exception as e:
+            self.logger.error("Error running genre model: %s", e)
+            self.logger.error("Full traceback:", exc_info=True)
+            genres = None
+        if genres is None:
+            return [self.heuristic_genre(features) for features in features_list]
+        self.logger.debug("Genre predicted by model for %s track(s): %s", len(genres), ', '.join(genres))
+        return genres
+    
+    def heuristic_genre(self, features):
+        """Predict genre from features using simple heuristics"""
+        self.logger.debug("Starting genre prediction using heuristics...")
+
+        try:
+            bpm = features['bpm']
+            spectral_centroid = features['spectral_centroid_mean']
+            zcr = features['zcr_mean']
+
+            # Simple heuristic-based genre classification
+            if bpm > 140 and spectral_centroid > 3000:
+                genre = "Electronic/Dance"
+            elif bpm > 120:
+                genre = "Pop/Rock"
+            elif spectral_centroid < 2000 and zcr < 0.1:
+                genre = "Classical"
+            elif spectral_centroid > 2500 and bpm < 100:
+                genre = "Jazz"
+            else:
+                genre = "Other"
+
+            self.logger.debug("Genre predicted: %s (BPM: %s, Spectral Centroid: %.2f, ZCR: %.4f)", genre, bpm, spectral_centroid, zcr)
+            return genre
+
+        except Exception as e:
+            self.logger.error("Error predicting genre: %s", e)
+            self.logger.error("Full traceback:", exc_info=True)
+            return "Unknown"
+    
+    def match_fingerprint(self, audio_path, data=None):
+        """Fingerprint a track and look it up; returns ((fingerprint, duration), match or None)
+        
+        A fingerprint failure never fails the analysis: it returns (None, None)
+        and the full pipeline runs as usual.
+        """
+        try:
+            source = data if data is not None else audio_path
+            fingerprint = track_fingerprint(source, audio_path)
+            if fingerprint is None:
+                return None, None
+            # The track's length narrows the lookup to fingerprints of similar length
+            duration = source_duration(source, audio_path)
+            return (fingerprint, duration), self.fingerprints.lookup(fingerprint, duration)
+        except Exception as e:
+            self.logger.warning("Fingerprinting failed for %s: %s", audio_path, e)
+            return None, None
+    
+    def analyze_song(self, audio_path, data=None, streaming=False, fast=False, segments=False):
+        """Complete analysis of a song (from memory when data is given, block-wise when
+        streaming, from excerpts when fast, with key/tempo curves when segments)"""
+        self.logger.info("Starting complete song analysis for: %s", audio_path)
+        
+        # Segments are only produced by a full analysis
+        segments = segments and not (fast or streaming)
+        variant = FAST_VARIANT if fast else SEGMENTS_VARIANT if segments else None
+        
+        content_hash = None
+        if (self.cache is not None or self.store is not None) and (data is not None or os.path.exists(audio_path)):
+            content_hash = hash_bytes(data) if data is not None else hash_file(audio_path)
+        
+        if self.cache is not None and content_hash is not None:
+            cached = self.cache.get(content_hash, variant=variant)
+            if cached is not None:
+                self.logger.info("Returning cached analysis for content hash %s", content_hash)
+                return cached
+        
+        timer = StageTimer()
+        # Previews and segment curves need the audio itself, so only plain analyses use fingerprints
+        fingerprint = None
+        if self.fingerprints is not None and not (fast or segments):
+            with timer.stage('fingerprint'):
+                fingerprint, match = self.match_fingerprint(audio_path, data)
+            if match is not None:
+                result, bit_error_rate = match
+                result['fingerprint_match'] = round(bit_error_rate, 3)
+                self.logger.info("Fingerprint match for %s (bit error rate %.3f), skipping full analysis", audio_path, bit_error_rate)
+                if self.cache is not None and content_hash is not None:
+                    self.cache.put(content_hash, result, variant=variant)
+                return dict(result, timings=timer.as_dict())
+        
+        features = self.extract_features(audio_path, data, streaming, fast, segments, timer)
+        if features is None:
+            self.logger.error("Feature extraction failed, cannot continue analysis")
+            return None
+        
+        # Predict genre
+        with timer.stage('genre'):
+            genre = self.predict_genre(features)
+        
+        result = {
+            'key': features['key'],
+            'bpm': round(features['bpm'], 2),
+            'genre': genre,
+            'decoder': features.pop('decoder'),
+            'features': features
+        }
+        
+        if fast:
+            result['mode'] = FAST_VARIANT
+            result['confidence'] = features['confidence']
+        if segments:
+            result['segments'] = features.pop('segments')
+        if 'trimmed' in features:
+            result['trimmed'] = features.pop('trimmed')
+        
+        if self.cache is not None and content_hash is not None:
+            self.cache.put(content_hash, result, variant=variant)
+        
+        if fingerprint is not None:
+            try:
+                query, duration = fingerprint
+                self.fingerprints.add(query, result, duration)
+            except Exception as e:
+                self.logger.warning("Failed to index fingerprint: %s", e)
+        
+        # Previews only see excerpts, so only full analyses go into the feature store
+        if self.store is not None and content_hash is not None and not fast:
+            try:
+                self.store.put(content_hash, features)
+            except Exception as e:
+                self.logger.warning("Failed to record features in the feature store: %s", e)
+        
+        self.logger.info("Song analysis completed successfully: Key=%s, BPM=%s, Genre=%s", result['key'], result['bpm'], result['genre'])
+        self.logger.debug("Stage timings for %s: %s", audio_path, timer.wall)
+        if timer.memory:
+            # Auditing is opt-in (TRACE_ALLOCATIONS, scan --audit), so its report is not sampled away
+            self.logger.info("Stage allocation peaks for %s: %s", audio_path, timer.memory_report())
+        # Timings describe this run only, so they stay out of the cached copy
+        return dict(result, timings=timer.as_dict())
+    
+    def analyze_excerpts(self, audio_paths):
+        """Analyze a centered excerpt of each of several files as one stacked batch
+        
+        Much higher throughput than one analyze_song call per file on large
+        libraries, at the accuracy of a single 30-second excerpt. Returns one
+        result per path (None where a file could not be analyzed), with
+        mode 'excerpt' and each track's share of the batch's stage timings.
+        """
+        self.logger.info("Starting batched excerpt analysis of %s files", len(audio_paths))
+        results = [None] * len(audio_paths)
+        hashes = [None] * len(audio_paths)
+        todo = []
+        for i, path in enumerate(audio_paths):
+            if self.cache is not None and os.path.exists(path):
+                hashes[i] = hash_file(path)
+                results[i] = self.cache.get(hashes[i], variant=EXCERPT_VARIANT)
+            if results[i] is None:
+                todo.append(i)
+        if not todo:
+            return results
+        
+        timer = StageTimer()
+        try:
+            with timer.stage('decode'):
+                stack, lengths, decoders = load_stack([audio_paths[i] for i in todo])
+            features_list = self.compute_stack_features(stack, lengths, DEFAULT_SR, timer)
+        except Exception as e:
+            self.logger.error("Error extracting features for a batch of %s files: %s", len(todo), e)
+            self.logger.error("Full traceback:", exc_info=True)
+            return results
+        
+        analyzed = [(i, features, decoder) for i, features, decoder in zip(todo, features_list, decoders) if features is not None]
+        genres = []
+        if analyzed:
+            with timer.stage('genre'):
+                genres = self.predict_genres([features for _, features, _ in analyzed])
+        # Batch stages serve every track at once, so each result carries an even share
+        timings = {stage: round(seconds / len(todo), 4) for stage, seconds in timer.as_dict().items()}
+        
+        for (i, features, decoder), genre in zip(analyzed, genres):
+            result = {
+                'key': features['key'],
+                'bpm': round(features['bpm'], 2),
+                'genre': genre,
+                'decoder': decoder,
+                'features': features,
+                'mode': EXCERPT_VARIANT
+            }
+            if self.cache is not None and hashes[i] is not None:
+                self.cache.put(hashes[i], result, variant=EXCERPT_VARIANT)
+            results[i] = dict(result, timings=timings)
+        
+        self.logger.info("Batched excerpt analysis completed: %s of %s files analyzed", len(analyzed), len(todo))
+        return results
+    
+    def analyze_many(self, paths, workers=None, batch_size=None):
+        """Analyze many files across worker processes
+        
+        Yields (path, result) pairs in completion order; result is None when
+        a file could not be analyzed. With batch_size, each worker analyzes
+        that many files at a time with analyze_excerpts.
+        """
+        from .batch import map_unordered
+        from .multitrack import chunks
+        from .pool import analyze_batch, analyze_path, create_executor
+        
+        workers = workers or os.cpu_count() or 1
+        self.logger.info("Starting batch analysis with %s worker processes", workers)
+        with create_executor('process', workers, self.worker_options()) as executor:
+            if not batch_size:
+                for path, result, error in map_unordered(executor, analyze_path, paths, window=workers * 4):
+                    if error is not None:
+                        self.logger.error("Batch analysis failed for %s: %s", path, error)
+                    yield path, result
+                return
+            
+            for batch, results, error in map_unordered(executor, analyze_batch, chunks(paths, batch_size), window=workers * 2):
+                if error is not None:
+                    self.logger.error("Batch analysis failed for %s files from %s: %s", len(batch), batch[0], error)
+                    results = [None] * len(batch)
+                yield from zip(batch, results)
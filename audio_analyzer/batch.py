@@ -0,0 +1,150 @@
+import csv
+import json
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+# Same formats the web app accepts
+AUDIO_EXTENSIONS = {'wav', 'mp3', 'flac', 'm4a', 'ogg'}
+
+CSV_FIELDS = ['path', 'key', 'bpm', 'genre', 'error']
+
+
+def find_audio_files(directory):
+    """All supported audio files below directory, in a stable order"""
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if '.' in name and name.rsplit('.', 1)[1].lower() in AUDIO_EXTENSIONS:
+                paths.append(os.path.join(root, name))
+    return paths
+
+
+def map_unordered(executor, func, items, window=8):
+    """Apply func to items on an executor, yielding (item, result, error) as calls finish
+
+    At most `window` calls are in flight, so huge inputs don't queue up
+    tens of thousands of futures at once.
+    """
+    items = iter(items)
+    pending = {}
+
+    def fill():
+        while len(pending) < window:
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            pending[executor.submit(func, item)] = item
+
+    fill()
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            item = pending.pop(future)
+            try:
+                yield item, future.result(), None
+            except Exception as e:
+                yield item, None, str(e)
+        fill()
+
+
+def output_format(output_path):
+    """'csv' or 'jsonl', chosen by the output file's extension"""
+    return 'csv' if output_path.lower().endswith('.csv') else 'jsonl'
+
+
+def completed_paths(output_path):
+    """Paths already recorded in an existing output file, so a scan can resume"""
+    if not os.path.exists(output_path):
+        return set()
+
+    done = set()
+    with open(output_path, newline='', encoding='utf-8') as f:
+        if output_format(output_path) == 'csv':
+            for row in csv.DictReader(f):
+                # A row cut short by an interrupted run is missing trailing fields
+                if row.get('error') is not None:
+                    done.add(row['path'])
+        else:
+            for line in f:
+                try:
+                    done.add(json.loads(line)['path'])
+                except (ValueError, KeyError):
+                    # A line cut short by an interrupted run; that file is redone
+                    continue
+    return done
+
+
+def _ends_with_newline(path):
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+
+class ResultWriter:
+    """Append batch results to a JSONL or CSV file, flushing after every row"""
+
+    def __init__(self, output_path):
+        self.format = output_format(output_path)
+        new_file = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+        partial_line = not new_file and not _ends_with_newline(output_path)
+        self._file = open(output_path, 'a', newline='', encoding='utf-8')
+        if partial_line:
+            # Terminate a row cut short by an interrupted run before appending
+            self._file.write('\n')
+        if self.format == 'csv':
+            self._csv = csv.DictWriter(self._file, fieldnames=CSV_FIELDS)
+            if new_file:
+                self._csv.writeheader()
+
+    def write(self, path, result, error=None):
+        if result is None and error is None:
+            error = 'Failed to analyze audio file'
+        if self.format == 'csv':
+            row = {'path': path, 'error': error or ''}
+            if result is not None:
+                row.update(key=result['key'], bpm=result['bpm'], genre=result['genre'])
+            self._csv.writerow(row)
+        else:
+            record = {'path': path}
+            if result is not None:
+                record.update(result)
+            if error is not None:
+                record['error'] = error
+            self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def scan(analyzer, directory, output_path, workers=None, batch_size=None):
+    """Analyze every audio file under directory, appending results to output_path
+
+    Files already present in output_path are skipped, so an interrupted scan
+    picks up where it stopped. With batch_size, files are analyzed that many
+    at a time from stacked excerpts (see MusicAnalyzer.analyze_excerpts).
+    Returns the number of files analyzed.
+    """
+    paths = find_audio_files(directory)
+    done = completed_paths(output_path)
+    todo = [path for path in paths if path not in done]
+    logger.info("Found %s audio files, %s already done, %s to analyze", len(paths), len(done), len(todo))
+
+    count = 0
+    with ResultWriter(output_path) as writer:
+        for path, result in analyzer.analyze_many(todo, workers=workers, batch_size=batch_size):
+            writer.write(path, result)
+            count += 1
+            logger.info("[%s/%s] %s", count, len(todo), path)
+    return count
@@ -0,0 +1,233 @@
+"""Benchmark the analysis pipeline on deterministic synthetic tracks
+
+    python -m audio_analyzer.bench -o bench.json
+
+Every stage of feature extraction is timed separately (wall and CPU time,
+best of --repeat runs), alongside throughput in audio-seconds per CPU-second,
+peak RSS, and the BPM/key each synthetic track was built to have. With
+--audit, each stage also reports the peak memory it allocated, traced with
+tracemalloc. The JSON output has sorted keys so two runs can be diffed
+between commits.
+"""
+import argparse
+import io
+import json
+import logging
+import platform
+import sys
+import tracemalloc
+
+import numpy as np
+
+from .analyzer import ANALYZER_VERSION, MusicAnalyzer
+from .features import RATE_PROFILES
+from .genre import MODEL_PATH, GenreModel
+from .key import PITCH_CLASSES
+from .lazy import librosa
+from .lazy import soundfile as sf
+from .logs import LOG_FORMAT
+from .metrics import STAGES, StageTimer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Semitone offsets of the major and natural minor scales
+MAJOR_SCALE = [0, 2, 4, 5, 7, 9, 11]
+MINOR_SCALE = [0, 2, 3, 5, 7, 8, 10]
+
+
+def click_track(bpm, duration, sr):
+    """Short decaying 1 kHz clicks on every beat"""
+    y = np.zeros(int(duration * sr), dtype=np.float32)
+    click = np.sin(2 * np.pi * 1000.0 * np.arange(int(0.02 * sr)) / sr) * np.exp(-np.linspace(0, 8, int(0.02 * sr)))
+    for start in (np.arange(0, duration, 60.0 / bpm) * sr).astype(int):
+        stop = min(len(y), start + len(click))
+        y[start:stop] += click[:stop - start]
+    return y
+
+
+def tonal_sequence(key_name, duration, sr, note_length=0.5):
+    """Scale notes of a key, each over a sustained tonic triad"""
+    minor = key_name.endswith('m')
+    tonic = PITCH_CLASSES.index(key_name[:-1] if minor else key_name)
+    scale = MINOR_SCALE if minor else MAJOR_SCALE
+    triad = [scale[0], scale[2], scale[4]]
+
+    def tone(semitones, t):
+        # Pitch classes are placed in the octave above C4
+        return np.sin(2 * np.pi * 261.63 * 2 ** ((tonic + semitones) / 12) * t)
+
+    t = np.arange(int(duration * sr)) / sr
+    y = sum(0.2 * tone(semitones, t) for semitones in triad)
+    note = (t // note_length).astype(int) % len(scale)
+    y += 0.3 * tone(np.array(scale)[note], t)
+    return (y / np.max(np.abs(y))).astype(np.float32)
+
+
+def noise(duration, sr, seed=0):
+    """White noise from a fixed seed"""
+    return np.random.default_rng(seed).uniform(-0.5, 0.5, int(duration * sr)).astype(np.float32)
+
+
+def default_cases(quick=False):
+    """The benchmark suite: (name, kind, parameter, duration, sample rate)"""
+    duration = 10.0 if quick else 30.0
+    cases = [(f"clicks-{bpm}bpm", 'clicks', bpm, duration, 22050) for bpm in (90, 120, 140)]
+    cases += [(f"tonal-{name}", 'tonal', name, duration, 22050) for name in ('C', 'Am', 'F#')]
+    cases += [
+        (f"noise-{int(length)}s-{sr}", 'noise', None, length, sr)
+        for length, sr in ((duration, 22050), (duration, 44100), (duration * 4, 22050))
+    ]
+    return cases
+
+
+def synthesize(kind, parameter, duration, sr):
+    if kind == 'clicks':
+        return click_track(parameter, duration, sr)
+    if kind == 'tonal':
+        return tonal_sequence(parameter, duration, sr)
+    return noise(duration, sr)
+
+
+def wav_bytes(y, sr):
+    buffer = io.BytesIO()
+    sf.write(buffer, y, sr, format='WAV')
+    return buffer.getvalue()
+
+
+def run_stages(analyzer, data):
+    """Analyze WAV bytes once with a CPU-timing StageTimer; returns (timings, features)"""
+    timer = StageTimer(cpu=True)
+    features = analyzer.extract_features('bench.wav', data=data, timer=timer)
+    if features is None:
+        raise RuntimeError('Benchmark analysis failed')
+    with timer.stage('genre'):
+        features['genre'] = analyzer.predict_genre(features)
+    timings = {stage: {'wall': timer.wall[stage], 'cpu': timer.cpu[stage]} for stage in timer.wall}
+    for stage, peak in (timer.memory or {}).items():
+        timings[stage]['peak_mb'] = peak / 2 ** 20
+    return timings, features
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where unsupported"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def bench_case(analyzer, case, repeat):
+    name, kind, parameter, duration, sr = case
+    data = wav_bytes(synthesize(kind, parameter, duration, sr), sr)
+
+    best = {}
+    for _ in range(repeat):
+        timings, features = run_stages(analyzer, data)
+        for stage, timing in timings.items():
+            if stage not in best or timing['cpu'] < best[stage]['cpu']:
+                best[stage] = timing
+    cpu = sum(timing['cpu'] for timing in best.values())
+
+    result = {
+        'name': name,
+        'duration': duration,
+        'sr': sr,
+        'stages': {stage: {k: round(v, 4) for k, v in timing.items()} for stage, timing in best.items()},
+        'cpu': round(cpu, 4),
+        'wall': round(sum(timing['wall'] for timing in best.values()), 4),
+        'throughput': round(duration / cpu, 2) if cpu else None,
+        'bpm': round(features['bpm'], 2),
+        'key': features['key'],
+        'genre': features['genre'],
+    }
+    if kind == 'clicks':
+        result['expected_bpm'] = parameter
+    elif kind == 'tonal':
+        result['expected_key'] = parameter
+        result['key_correct'] = features['key'] == parameter
+    return result
+
+
+def run(profile='full', repeat=3, quick=False, warmup=True, genre_model=False, float32=False, audit=False):
+    """Run the suite and return the JSON-ready report"""
+    # Genres use the heuristics unless the (slow-loading, opt-in) model is asked for
+    analyzer = MusicAnalyzer(rates=RATE_PROFILES[profile], genre_model=GenreModel(MODEL_PATH if genre_model else None),
+                             float32=float32)
+    if warmup:
+        analyzer.warmup(genre_model=genre_model)
+
+    if audit:
+        tracemalloc.start()
+    try:
+        cases = [bench_case(analyzer, case, repeat) for case in default_cases(quick)]
+    finally:
+        if audit:
+            tracemalloc.stop()
+    audio_seconds = sum(case['duration'] for case in cases)
+    cpu = sum(case['cpu'] for case in cases)
+    return {
+        'analyzer_version': ANALYZER_VERSION,
+        'profile': profile,
+        'float32': float32,
+        'repeat': repeat,
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'librosa': librosa.__version__,
+            'machine': platform.machine(),
+        },
+        'cases': cases,
+        'totals': {
+            'audio_seconds': audio_seconds,
+            'cpu': round(cpu, 4),
+            'throughput': round(audio_seconds / cpu, 2) if cpu else None,
+            'stages_cpu': {
+                stage: round(sum(case['stages'][stage]['cpu'] for case in cases if stage in case['stages']), 4)
+                for stage in STAGES if any(stage in case['stages'] for case in cases)
+            },
+            'stages_peak_mb': {
+                stage: round(max(case['stages'][stage]['peak_mb'] for case in cases if stage in case['stages']), 2)
+                for stage in STAGES if audit and any(stage in case['stages'] for case in cases)
+            },
+            'keys_correct': sum(case.get('key_correct', False) for case in cases),
+            'keys_expected': sum('expected_key' in case for case in cases),
+        },
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m audio_analyzer.bench', description='Benchmark the analysis pipeline')
+    parser.add_argument('-o', '--output', default=None, help='Write the JSON report here (default: stdout)')
+    parser.add_argument('--profile', choices=sorted(RATE_PROFILES), default='full',
+                        help='Analysis rate profile (default: %(default)s)')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Runs per track; the fastest counts (default: %(default)s)')
+    parser.add_argument('--quick', action='store_true', help='10 s tracks instead of 30 s')
+    parser.add_argument('--no-warmup', dest='warmup', action='store_false',
+                        help='Include JIT compilation in the first run')
+    parser.add_argument('--genre-model', action='store_true', help='Time the trained genre model instead of the heuristics')
+    parser.add_argument('--float32', action='store_true', help='Benchmark the float32 analysis engine')
+    parser.add_argument('--audit', action='store_true',
+                        help='Trace per-stage allocation peaks with tracemalloc (slows every stage down)')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format=LOG_FORMAT)
+
+    report = run(args.profile, args.repeat, args.quick, args.warmup, args.genre_model, args.float32, args.audit)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        totals = report['totals']
+        print(f"{len(report['cases'])} tracks, {totals['throughput']} audio-s/CPU-s, "
+              f"peak RSS {report['peak_rss_mb']} MB; report in {args.output}")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+# Puts between evictions in each process; the table can briefly exceed max_entries by this many per process
+EVICT_EVERY = 100
+# A hit writes an entry's last_used back to SQLite at most this often, in seconds
+TOUCH_INTERVAL = 3600.0
+
+
+def hash_bytes(data):
+    """SHA-256 hex digest of in-memory content"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path):
+    """SHA-256 hex digest of a file's content, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """LRU cache of analysis results keyed by content hash and analyzer version
+
+    Recently used entries are kept in memory; every entry is also persisted
+    to SQLite so results survive restarts and are shared between processes.
+    Recency on disk is approximate: hits refresh last_used at most once per
+    TOUCH_INTERVAL, and the least recently used entries over max_entries are
+    evicted every EVICT_EVERY puts.
+    """
+
+    def __init__(self, path, version, max_entries=10000, memory_entries=256):
+        self.path = path
+        self.version = version
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        # Start due, so a fresh process trims the table on its first put
+        self._puts_since_evict = EVICT_EVERY
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def key(self, content_hash, variant=None):
+        """Cache key for a content hash under the current analyzer version
+
+        variant separates results of other analysis modes for the same content.
+        """
+        key = f"{self.version}:{content_hash}"
+        return f"{key}:{variant}" if variant else key
+
+    def get(self, content_hash, variant=None):
+        """Return the cached result for a content hash, or None"""
+        key = self.key(content_hash, variant)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        with self._connect() as conn:
+            row = conn.execute('SELECT value, last_used FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[1] > TOUCH_INTERVAL:
+                conn.execute('UPDATE results SET last_used = ? WHERE key = ?', (now, key))
+
+        result = json.loads(row[0])
+        self._remember(key, result)
+        return result
+
+    def put(self, content_hash, result, variant=None):
+        """Store a result, evicting the least recently used entries over the cap every EVICT_EVERY puts"""
+        key = self.key(content_hash, variant)
+        with self._lock:
+            self._puts_since_evict += 1
+            evict = self._puts_since_evict >= EVICT_EVERY
+            if evict:
+                self._puts_since_evict = 0
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO results (key, value, last_used) VALUES (?, ?, ?)',
+                (key, json.dumps(result), time.time())
+            )
+            if evict:
+                # Walks the last_used index to the cap's boundary instead of scanning every key
+                conn.execute(
+                    'DELETE FROM results WHERE last_used < '
+                    '(SELECT last_used FROM results ORDER BY last_used DESC LIMIT 1 OFFSET ?)',
+                    (self.max_entries - 1,)
+                )
+        self._remember(key, result)
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
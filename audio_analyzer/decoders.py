@@ -0,0 +1,160 @@
+import importlib.util
+import io
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+
+from .lazy import librosa
+from .lazy import soundfile as sf
+
+logger = logging.getLogger(__name__)
+
+# librosa.load's default analysis rate
+DEFAULT_SR = 22050
+
+# Formats every libsndfile version reads reliably, from a memory buffer or block by block
+IN_MEMORY_FORMATS = {'wav', 'flac', 'ogg'}
+
+# Formats the ffmpeg libraries behind PyAV (a requirement, but optional at runtime) decode in process
+AV_FORMATS = {'wav', 'flac', 'ogg', 'mp3', 'm4a'}
+
+
+def extension(filename):
+    """Lower-case extension of a filename, without the dot"""
+    return os.path.splitext(filename)[1].lstrip('.').lower()
+
+
+@contextmanager
+def temporary_path(data, filename):
+    """Write bytes to a uniquely named temporary file, removed on exit"""
+    fd, path = tempfile.mkstemp(suffix=f".{extension(filename)}")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        yield path
+    finally:
+        os.remove(path)
+
+
+def _open(source):
+    # Decoders take a path or a file object; bytes become an in-memory file
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+@lru_cache(maxsize=None)
+def soundfile_formats():
+    """Formats the installed libsndfile decodes (MP3 from libsndfile 1.1.0 on)"""
+    formats = set(IN_MEMORY_FORMATS)
+    version = tuple(int(part) for part in sf.__libsndfile_version__.split('.')[:2])
+    if version >= (1, 1):
+        formats.add('mp3')
+    return formats
+
+
+@lru_cache(maxsize=None)
+def av_formats():
+    """Formats PyAV decodes, or none when it is not installed"""
+    return AV_FORMATS if importlib.util.find_spec('av') is not None else set()
+
+
+def _read_soundfile(source, sr, offset=0.0, duration=None):
+    with sf.SoundFile(_open(source)) as f:
+        native_sr = f.samplerate
+        f.seek(min(int(offset * native_sr), f.frames))
+        frames = -1 if duration is None else int(duration * native_sr)
+        y = f.read(frames, dtype='float32', always_2d=True)
+    y = np.mean(y, axis=1)
+    if native_sr != sr:
+        y = librosa.resample(y, orig_sr=native_sr, target_sr=sr)
+    return y
+
+
+def _read_av(source, sr, offset=0.0, duration=None):
+    import av
+
+    with av.open(_open(source)) as container:
+        stream = container.streams.audio[0]
+        # Planar float at the target rate; channels are averaged below, as librosa does
+        resampler = av.AudioResampler(format='fltp', rate=sr)
+        if offset > 0:
+            container.seek(int(offset / stream.time_base), stream=stream)
+        wanted = None if duration is None else int(duration * sr)
+        chunks, skip, decoded = [], None, 0
+        for frame in container.decode(stream):
+            if skip is None:
+                # Seeking lands on a frame at or before offset; drop the difference
+                skip = max(0, int(round((offset - (frame.time or 0.0)) * sr)))
+            for out in resampler.resample(frame):
+                chunks.append(out.to_ndarray())
+                decoded += chunks[-1].shape[1]
+            if wanted is not None and decoded >= skip + wanted:
+                break
+        else:
+            chunks.extend(out.to_ndarray() for out in resampler.resample(None))
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    y = np.mean(np.concatenate(chunks, axis=1), axis=0).astype(np.float32)[skip:]
+    return y if wanted is None else y[:wanted]
+
+
+def _read_librosa(source, sr, offset=0.0, duration=None, filename=''):
+    # audioread fallback: may spawn an ffmpeg process, so only used when nothing else can decode
+    if isinstance(source, bytes):
+        logger.debug("No in-process decoder for .%s, using a temporary file", extension(filename))
+        with temporary_path(source, filename) as path:
+            return _read_librosa(path, sr, offset, duration)
+    return librosa.load(source, sr=sr, offset=offset, duration=duration)[0]
+
+
+# In-process decoders in order of preference: (name, formats it decodes, read function)
+DECODERS = [
+    ('soundfile', soundfile_formats, _read_soundfile),
+    ('pyav', av_formats, _read_av),
+]
+
+
+def decoders_for(filename):
+    """Names of the in-process decoders for filename's format, fastest first"""
+    fmt = extension(filename)
+    return [name for name, formats, _ in DECODERS if fmt in formats()]
+
+
+def decode(source, filename, sr=DEFAULT_SR, offset=0.0, duration=None):
+    """Decode audio bytes or a file path to a mono float32 signal at sr
+
+    Decoders are tried fastest first for the file's extension: libsndfile,
+    then PyAV if it is installed, then librosa's audioread fallback, the only
+    one that may spawn an ffmpeg process. Returns (y, sr, decoder name).
+    """
+    for name, formats, read in DECODERS:
+        if extension(filename) not in formats():
+            continue
+        try:
+            return read(source, sr, offset, duration), sr, name
+        except Exception as e:
+            logger.debug("%s could not decode %s, trying the next decoder: %s", name, filename, e)
+    return _read_librosa(source, sr, offset, duration, filename), sr, 'librosa'
+
+
+def source_duration(source, filename):
+    """Duration in seconds of audio bytes or a file, read from the header where possible"""
+    fmt = extension(filename)
+    if fmt in soundfile_formats():
+        try:
+            return sf.info(_open(source)).duration
+        except Exception as e:
+            logger.debug("soundfile could not read the header of %s: %s", filename, e)
+    if fmt in av_formats():
+        import av
+
+        with av.open(_open(source)) as container:
+            if container.duration is not None:
+                return container.duration / av.time_base
+    if isinstance(source, bytes):
+        with temporary_path(source, filename) as path:
+            return librosa.get_duration(path=path)
+    return librosa.get_duration(path=source)
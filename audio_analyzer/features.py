@@ -0,0 +1,229 @@
+import threading
+
+import numpy as np
+
+from .lazy import librosa
+
+# Frame parameters shared by every derived feature (librosa defaults)
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MFCC = 13
+# Dynamic range of the log-mel spectrogram below each track's peak (power_to_db's default)
+TOP_DB = 80.0
+
+# Rate the frame parameters above are tuned for
+REFERENCE_SR = 22050
+
+# Analysis rate per feature group; 'spectral' covers MFCC, centroid, rolloff and ZCR
+FULL_RATES = {'tempo': 22050, 'chroma': 22050, 'spectral': 22050}
+# Tempo and key need little bandwidth, so they run on a half-rate signal
+REDUCED_RATES = {'tempo': 11025, 'chroma': 11025, 'spectral': 22050}
+RATE_PROFILES = {'full': FULL_RATES, 'reduced': REDUCED_RATES}
+
+# Fast resampler; the reduced-rate features don't need audiophile filtering
+RESAMPLE_TYPE = 'soxr_lq'
+
+# Frames processed at a time by the float32 engine's blockwise STFT, rolloff and tuning
+BLOCK_FRAMES = 256
+# librosa's defaults for spectral_rolloff and zero_crossings
+ROLL_PERCENT = 0.85
+ZERO_THRESHOLD = 1e-10
+
+_work = threading.local()
+
+
+def work_buffer(name, shape, dtype):
+    """Per-thread scratch array of the given shape, reused across stages and analyses
+
+    The backing memory only grows, so after the first track a thread stops
+    allocating block-sized temporaries. Contents are undefined, and a caller
+    must be done with the array before asking for the same name again.
+    """
+    buffers = _work.__dict__.setdefault('buffers', {})
+    size = int(np.prod(shape))
+    buffer = buffers.get(name)
+    if buffer is None or buffer.dtype != dtype or buffer.size < size:
+        buffer = buffers[name] = np.empty(size, dtype=dtype)
+    return buffer[:size].reshape(shape)
+
+
+def frame_size(size, sr):
+    """Scale a frame size tuned for REFERENCE_SR to sr, keeping the same duration"""
+    scaled = size * sr / REFERENCE_SR
+    # Stay on a power of two so the FFT remains fast
+    return int(2 ** np.round(np.log2(scaled)))
+
+
+def rates_tag(rates):
+    """Short stable label for a rate configuration, e.g. 'chroma11025-spectral22050-tempo11025'"""
+    return '-'.join(f"{feature}{rate}" for feature, rate in sorted(rates.items()))
+
+
+class FeatureEngine:
+    """Compute spectrogram representations of a track once and derive features from them
+
+    y may also be a zero-padded (n_tracks, samples) stack of tracks; every
+    representation then gains the same leading track axis.
+
+    With float32=True every spectrogram stays float32 and nothing the size of
+    a whole spectrogram is allocated beyond the magnitude, power and mel
+    arrays themselves. The STFT, rolloff and tuning run in blocks of
+    BLOCK_FRAMES frames through reused work buffers; centroid and ZCR are
+    computed without librosa's float64 and framed-signal temporaries.
+    """
+
+    def __init__(self, y, sr, n_fft=N_FFT, hop_length=HOP_LENGTH, center=True, float32=False):
+        self.y = np.asarray(y, dtype=np.float32) if float32 else y
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        # Streamed blocks are pre-framed, so they are analyzed with center=False
+        self.center = center
+        self.float32 = float32
+
+        # One STFT per track; every spectral feature below reuses it
+        if float32:
+            self.magnitude = self._blockwise_magnitude()
+        else:
+            self.magnitude = np.abs(librosa.stft(y, n_fft=n_fft, hop_length=hop_length, center=center))
+        self.power = np.square(self.magnitude)
+        # One mel spectrogram per track, shared by MFCC and onset strength
+        mel_db = librosa.power_to_db(librosa.feature.melspectrogram(S=self.power, sr=sr), top_db=None)
+        # Floor each track at TOP_DB below its own peak, not the peak of the whole stack
+        self.mel_db = np.maximum(mel_db, np.max(mel_db, axis=(-2, -1), keepdims=True) - TOP_DB, out=mel_db)
+
+    def _blockwise_magnitude(self):
+        # Pad once as stft(center=True) would, then transform BLOCK_FRAMES frames at a
+        # time into one reused complex buffer, so the full complex STFT never exists
+        y = self.y
+        if self.center:
+            y = np.pad(y, [(0, 0)] * (y.ndim - 1) + [(self.n_fft // 2, self.n_fft // 2)])
+        n_frames = 1 + (y.shape[-1] - self.n_fft) // self.hop_length
+        magnitude = np.empty(y.shape[:-1] + (1 + self.n_fft // 2, n_frames), dtype=np.float32)
+        for start in range(0, n_frames, BLOCK_FRAMES):
+            stop = min(n_frames, start + BLOCK_FRAMES)
+            segment = y[..., start * self.hop_length:(stop - 1) * self.hop_length + self.n_fft]
+            out = work_buffer('stft', magnitude.shape[:-1] + (stop - start,), np.complex64)
+            librosa.stft(segment, n_fft=self.n_fft, hop_length=self.hop_length, center=False, out=out)
+            np.abs(out, out=magnitude[..., start:stop])
+        return magnitude
+
+    def _tuning(self, power):
+        """Tuning of a power spectrogram, as librosa.estimate_tuning computes it"""
+        if not self.float32:
+            return librosa.estimate_tuning(S=power, sr=self.sr, bins_per_octave=12)
+        # piptrack thresholds each frame on its own peak, so it can run block by block;
+        # only the (sparse) detected pitches are kept for the global median threshold
+        pitches, magnitudes = [], []
+        for start in range(0, power.shape[-1], BLOCK_FRAMES):
+            pitch, magnitude = librosa.piptrack(S=power[..., start:start + BLOCK_FRAMES], sr=self.sr)
+            found = pitch > 0
+            pitches.append(pitch[found])
+            magnitudes.append(magnitude[found])
+        pitch, magnitude = np.concatenate(pitches), np.concatenate(magnitudes)
+        threshold = np.median(magnitude) if len(magnitude) else 0.0
+        return librosa.pitch_tuning(pitch[magnitude >= threshold], bins_per_octave=12)
+
+    def chroma(self, tuning=None):
+        """Chromagram from the shared power spectrogram (tuning is estimated if None)"""
+        if tuning is None and self.float32:
+            tuning = self._tuning(self.power)
+        return librosa.feature.chroma_stft(S=self.power, sr=self.sr, tuning=tuning)
+
+    def stack_chroma_means(self, n_frames):
+        """Mean chroma vector of each track of a stack over its first n_frames[i] frames
+
+        Each track's tuning is estimated from its own frames, as chroma_stft
+        would; the per-track chroma filter banks are then applied to the
+        whole stacked power spectrogram in one product. Returns an
+        (n_tracks, 12) array, zero for tracks without frames.
+        """
+        n_frames = np.asarray(n_frames)
+        banks = np.stack([
+            librosa.filters.chroma(sr=self.sr, n_fft=self.n_fft, n_chroma=12,
+                                   tuning=self._tuning(self.power[i, :, :count]) if count else 0.0)
+            for i, count in enumerate(n_frames)
+        ])
+        chroma = librosa.util.normalize(np.einsum('kcf,kft->kct', banks, self.power, optimize=True), norm=np.inf, axis=-2)
+        mask = np.arange(chroma.shape[-1]) < n_frames[:, np.newaxis]
+        return np.sum(chroma * mask[:, np.newaxis, :], axis=-1) / np.maximum(n_frames, 1)[:, np.newaxis]
+
+    def frame_counts(self, lengths, sr):
+        """Frames covering each track of a stack, given track lengths in samples at sr"""
+        samples = np.ceil(np.asarray(lengths) * self.sr / sr).astype(int)
+        frames = samples // self.hop_length + 1 if self.center else 1 + (samples - self.n_fft) // self.hop_length
+        return np.clip(frames, 0, self.magnitude.shape[-1])
+
+    def estimate_tuning(self):
+        """Tuning deviation in fractions of a chroma bin, as chroma_stft estimates it"""
+        return self._tuning(self.power)
+
+    def mfcc(self, n_mfcc=N_MFCC):
+        """MFCCs from the shared log-mel spectrogram"""
+        return librosa.feature.mfcc(S=self.mel_db, sr=self.sr, n_mfcc=n_mfcc)
+
+    def spectral_centroid(self):
+        """Spectral centroid from the shared magnitude spectrogram"""
+        if not self.float32:
+            return librosa.feature.spectral_centroid(S=self.magnitude, sr=self.sr)
+        # One matrix product instead of librosa's normalized copy and float64 product
+        freq = librosa.fft_frequencies(sr=self.sr, n_fft=self.n_fft).astype(np.float32)
+        total = np.sum(self.magnitude, axis=-2)
+        centroid = np.divide(freq @ self.magnitude, total, out=np.zeros_like(total), where=total > 0)
+        return centroid[..., np.newaxis, :]
+
+    def spectral_rolloff(self):
+        """Spectral rolloff from the shared magnitude spectrogram"""
+        if not self.float32:
+            return librosa.feature.spectral_rolloff(S=self.magnitude, sr=self.sr)
+        # Lowest bin reaching ROLL_PERCENT of the frame's energy, cumulated a block at a time
+        freq = librosa.fft_frequencies(sr=self.sr, n_fft=self.n_fft).astype(np.float32)
+        n_frames = self.magnitude.shape[-1]
+        rolloff = np.empty(self.magnitude.shape[:-2] + (1, n_frames), dtype=np.float32)
+        for start in range(0, n_frames, BLOCK_FRAMES):
+            block = self.magnitude[..., start:start + BLOCK_FRAMES]
+            energy = np.cumsum(block, axis=-2, out=work_buffer('rolloff', block.shape, np.float32))
+            reached = energy >= ROLL_PERCENT * energy[..., -1:, :]
+            rolloff[..., 0, start:start + BLOCK_FRAMES] = freq[np.argmax(reached, axis=-2)]
+        return rolloff
+
+    def onset_strength(self):
+        """Onset strength envelope from the shared log-mel spectrogram"""
+        return librosa.onset.onset_strength(S=self.mel_db, sr=self.sr)
+
+    def zero_crossing_rate(self):
+        """Zero crossing rate framed to match the spectrogram"""
+        if not self.float32:
+            return librosa.feature.zero_crossing_rate(
+                self.y, frame_length=self.n_fft, hop_length=self.hop_length, center=self.center
+            )
+        # Sign changes are found once per sample and counted per frame from a running
+        # sum, instead of thresholding a framed copy n_fft / hop_length times the signal
+        y = self.y
+        if self.center:
+            y = np.pad(y, [(0, 0)] * (y.ndim - 1) + [(self.n_fft // 2, self.n_fft // 2)], mode='edge')
+        negative = np.signbit(np.where(np.abs(y) <= ZERO_THRESHOLD, 0, y))
+        changes = np.cumsum(negative[..., 1:] != negative[..., :-1], axis=-1, dtype=np.int32)
+        changes = np.concatenate([np.zeros(changes.shape[:-1] + (1,), dtype=np.int32), changes], axis=-1)
+        starts = np.arange(1 + (y.shape[-1] - self.n_fft) // self.hop_length) * self.hop_length
+        # Crossings between samples start .. start + n_fft - 1 of each frame
+        counts = changes[..., starts + self.n_fft - 1] - changes[..., starts]
+        return (counts / np.float32(self.n_fft)).astype(np.float32)[..., np.newaxis, :]
+
+
+def engines_for_rates(y, sr, rates, float32=False):
+    """Map each feature group to a FeatureEngine at its analysis rate
+
+    y is resampled once per distinct rate (never upsampled), and frame sizes
+    are scaled so every engine keeps the same time and frequency resolution.
+    float32 selects the float32 engine (see FeatureEngine).
+    """
+    if float32:
+        y = np.asarray(y, dtype=np.float32)
+    engines = {}
+    for rate in set(min(rate, sr) for rate in rates.values()):
+        y_rate = y if rate == sr else librosa.resample(y, orig_sr=sr, target_sr=rate, res_type=RESAMPLE_TYPE)
+        engines[rate] = FeatureEngine(
+            y_rate, rate, n_fft=frame_size(N_FFT, rate), hop_length=frame_size(HOP_LENGTH, rate), float32=float32
+        )
+    return {feature: engines[min(rate, sr)] for feature, rate in rates.items()}
@@ -0,0 +1,212 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from .decoders import decode
+from .lazy import librosa
+
+logger = logging.getLogger(__name__)
+
+# The fingerprint only needs pitch content, so a low rate keeps decoding cheap
+FINGERPRINT_SR = 11025
+# Length of the fingerprinted excerpt, in seconds
+EXCERPT_DURATION = 10.0
+# Leading silence skipped before the excerpt starts, so trimmed rips still line up
+MAX_LEAD_IN = 20.0
+SILENCE_DB = -40.0
+
+N_FFT = 4096
+HOP_LENGTH = 1024
+# Frames of misalignment tolerated between two versions of a track (~93 ms each)
+MAX_SHIFT = 2
+# 12 chroma-difference bits and 12 strong-pitch-class bits per frame
+BITS = 24
+# Fraction of differing bits below which two fingerprints are the same recording
+MATCH_THRESHOLD = 0.2
+# Copies of a track are only compared when their lengths differ by at most this many seconds
+# (re-encoding pads by milliseconds; a rip may have lost its leading or trailing silence)
+DURATION_TOLERANCE = MAX_LEAD_IN + 5.0
+# Fingerprints kept per index, newest first; each takes FRAMES * 4 bytes (~430 B) in every process
+MAX_ENTRIES = 50000
+
+
+def audible_start(y, sr, threshold_db=SILENCE_DB, hop_length=512):
+    """Sample index of the first frame within threshold_db of the loudest one"""
+    rms = librosa.feature.rms(y=y, frame_length=2048, hop_length=hop_length)[0]
+    loud = np.flatnonzero(librosa.amplitude_to_db(rms, ref=np.max) > threshold_db)
+    return int(loud[0] * hop_length) if len(loud) else 0
+
+
+def fingerprint(y, sr=FINGERPRINT_SR):
+    """One 24-bit sub-fingerprint per chroma frame of an excerpt, as uint32
+
+    The low 12 bits are signs of how the energy difference between adjacent
+    pitch classes changes from frame to frame (Haitsma-Kalker, on chroma); the
+    high 12 bits mark the pitch classes above the frame's mean. Both survive
+    re-encoding and bitrate changes.
+    """
+    # Fixed tuning: the estimate would add work and jitter between encodings
+    chroma = librosa.feature.chroma_stft(y=y, sr=sr, n_fft=N_FFT, hop_length=HOP_LENGTH, tuning=0.0)
+    diff = chroma - np.roll(chroma, -1, axis=0)
+    delta = diff[:, 1:] - diff[:, :-1]
+    strong = chroma[:, 1:] > np.mean(chroma[:, 1:], axis=0, keepdims=True)
+    bits = np.concatenate([delta > 0, strong]).T.astype(np.uint32)
+    return (bits << np.arange(BITS, dtype=np.uint32)).sum(axis=1, dtype=np.uint32)
+
+
+# Sub-fingerprints per excerpt: one per centered STFT frame but the first, which has no predecessor
+FRAMES = int(EXCERPT_DURATION * FINGERPRINT_SR) // HOP_LENGTH
+
+
+def track_fingerprint(source, filename):
+    """Fingerprint of the first EXCERPT_DURATION audible seconds of a track
+
+    source is audio bytes or a path. Returns None for tracks too short or
+    too featureless to fingerprint.
+    """
+    y, sr, _ = decode(source, filename, FINGERPRINT_SR, 0.0, MAX_LEAD_IN + EXCERPT_DURATION)
+    start = audible_start(y, sr)
+    excerpt = y[start:start + int(EXCERPT_DURATION * sr)]
+    if len(excerpt) < int(EXCERPT_DURATION * sr):
+        return None
+    query = fingerprint(excerpt, sr)
+    # Silence and sustained drones set almost no bits and would match each other
+    if np.mean(np.unpackbits(query.view(np.uint8))) < 0.1:
+        return None
+    return query
+
+
+def popcount(x):
+    """Number of set bits in each element of a uint64 array"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(x)
+    # SWAR popcount for numpy < 2.0
+    x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = (x & np.uint64(0x3333333333333333)) + ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (x * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+def bit_error_rates(query, fingerprints, max_shift=MAX_SHIFT):
+    """Lowest fraction of differing bits between query and each row, over small time shifts
+
+    The XOR of each window is viewed as uint64 words, two sub-fingerprints
+    each, and counted with a popcount instead of unpacking every bit.
+    """
+    core = query[max_shift:len(query) - max_shift]
+    # An even number of uint32 frames, so each row of the XOR is a whole number of uint64 words
+    core = np.ascontiguousarray(core[:len(core) // 2 * 2])
+    best = np.ones(len(fingerprints))
+    xor = np.empty((len(fingerprints), len(core)), dtype=np.uint32)
+    for shift in range(-max_shift, max_shift + 1):
+        window = fingerprints[:, max_shift + shift:max_shift + shift + len(core)]
+        np.bitwise_xor(window, core, out=xor)
+        errors = popcount(xor.view(np.uint64)).sum(axis=1)
+        best = np.minimum(best, errors / (len(core) * BITS))
+    return best
+
+
+class FingerprintIndex:
+    """SQLite index of track fingerprints and the key, BPM and genre analyzed for them
+
+    Fingerprints of the current analyzer version are kept in memory as one
+    matrix, topped up from SQLite with rows other processes have added. A
+    lookup only compares the rows whose track length is within
+    DURATION_TOLERANCE of the query's. The index keeps the newest
+    max_entries fingerprints, on disk and in memory.
+    """
+
+    def __init__(self, path, version, threshold=MATCH_THRESHOLD, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.version = version
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._ids = np.empty(0, dtype=np.int64)
+        self._durations = np.empty(0)
+        self._matrix = np.empty((0, FRAMES), dtype=np.uint32)
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS fingerprints ('
+                'id INTEGER PRIMARY KEY, version TEXT NOT NULL, fingerprint BLOB NOT NULL, result TEXT NOT NULL, '
+                'duration REAL)'
+            )
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(fingerprints)')]
+            if 'duration' not in columns:
+                conn.execute('ALTER TABLE fingerprints ADD COLUMN duration REAL')
+            conn.execute('CREATE INDEX IF NOT EXISTS fingerprints_version ON fingerprints (version, id)')
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _refresh(self):
+        # Called with the lock held: load rows added since the last lookup, keeping the newest max_entries
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT id, duration, fingerprint FROM fingerprints WHERE version = ? AND id > ? ORDER BY id',
+                (self.version, self._last_id)
+            ).fetchall()
+        if not rows:
+            return
+        rows = rows[-self.max_entries:]
+        keep = max(0, len(self._ids) + len(rows) - self.max_entries)
+        self._ids = np.concatenate([self._ids[keep:], [row_id for row_id, _, _ in rows]])
+        self._durations = np.concatenate([self._durations[keep:],
+                                          [np.nan if duration is None else duration for _, duration, _ in rows]])
+        self._matrix = np.concatenate([self._matrix[keep:],
+                                       [np.frombuffer(blob, dtype=np.uint32) for _, _, blob in rows]])
+        self._last_id = rows[-1][0]
+
+    def lookup(self, query, duration=None):
+        """(stored result, bit error rate) of the closest confident match, or None
+
+        With duration (the track's length in seconds), only fingerprints of
+        tracks of about the same length (or of unknown length) are compared.
+        """
+        with self._lock:
+            self._refresh()
+            candidates = np.arange(len(self._ids))
+            if duration is not None:
+                # NaN durations (unknown lengths) compare False, so invert the mismatch test
+                candidates = np.flatnonzero(~(np.abs(self._durations - duration) > DURATION_TOLERANCE))
+            if not len(candidates):
+                return None
+            rates = bit_error_rates(query, self._matrix[candidates])
+            best = int(np.argmin(rates))
+            if rates[best] > self.threshold:
+                return None
+            row_id, rate = int(self._ids[candidates[best]]), float(rates[best])
+
+        with self._connect() as conn:
+            row = conn.execute('SELECT result FROM fingerprints WHERE id = ?', (row_id,)).fetchone()
+        if row is None:
+            # Evicted by another process since it was loaded
+            return None
+        return json.loads(row[0]), rate
+
+    def add(self, query, result, duration=None):
+        """Index a fingerprint with the key, BPM and genre of its analysis, evicting the oldest beyond max_entries"""
+        summary = {name: result[name] for name in ('key', 'bpm', 'genre')}
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'INSERT INTO fingerprints (version, fingerprint, result, duration) VALUES (?, ?, ?, ?)',
+                (self.version, query.astype(np.uint32).tobytes(), json.dumps(summary), duration)
+            )
+            # Row ids only grow, so this is a range delete on the primary key (rows of older versions age out too)
+            conn.execute('DELETE FROM fingerprints WHERE id <= ?', (cursor.lastrowid - self.max_entries,))
@@ -0,0 +1,111 @@
+import logging
+import os
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Trained model shipped at the repository root. It is opt-in: its input layout and
+# scaling are not known (see MODEL_FEATURES), so by default genres come from heuristics
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'genre_model.joblib')
+
+# Feature vector layout the model is assumed to take: (name, width). The
+# training script is not in this repository, so this order is an assumption;
+# loading only checks that the model expects MODEL_WIDTH features. The shipped
+# forest's split thresholds suggest it was trained on standardized inputs,
+# which are not reproduced here, so its predictions are not reliable.
+MODEL_FEATURES = [
+    ('bpm', 1),
+    ('mfcc_mean', 13),
+    ('spectral_centroid_mean', 1),
+    ('spectral_centroid_std', 1),
+    ('zcr_mean', 1),
+    ('zcr_std', 1),
+    ('rolloff_mean', 1),
+    ('rolloff_std', 1),
+]
+MODEL_WIDTH = sum(width for _, width in MODEL_FEATURES)
+
+
+def feature_vector(features):
+    """Flatten a features dict into the model's input vector"""
+    return np.concatenate([np.atleast_1d(np.asarray(features[name], dtype=np.float64))
+                           for name, _ in MODEL_FEATURES])
+
+
+def feature_matrix(features_list):
+    """Stack many features dicts into an (n_tracks, MODEL_WIDTH) matrix"""
+    if not features_list:
+        return np.empty((0, MODEL_WIDTH))
+    return np.array([feature_vector(features) for features in features_list])
+
+
+class GenreModel:
+    """Lazily loaded genre classifier
+
+    The joblib file is loaded, with its arrays memory-mapped, by the first
+    prediction (or an explicit load()), on the calling thread; creating an
+    analyzer never imports scikit-learn. If loading fails (no scikit-learn,
+    missing file, unexpected feature count) predictions return None and
+    callers fall back to heuristics. path=None disables the model.
+    """
+
+    def __init__(self, path=MODEL_PATH):
+        self.path = path
+        self._model = None
+        self._loaded = False
+        # Why loading failed, if it did
+        self.error = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load the model if that has not been tried yet; returns it, or None"""
+        with self._lock:
+            if not self._loaded:
+                self._model = self._load()
+                self._loaded = True
+        return self._model
+
+    def _load(self):
+        if self.path is None:
+            return None
+        try:
+            import joblib
+
+            model = joblib.load(self.path, mmap_mode='r')
+            n_features = getattr(model, 'n_features_in_', None)
+            if n_features != MODEL_WIDTH:
+                raise ValueError(f"model expects {n_features} features, analyzer provides {MODEL_WIDTH}")
+            logger.info("Genre model loaded from %s (classes: %s)", self.path, ', '.join(model.classes_))
+            return model
+        except Exception as e:
+            logger.warning("Genre model unavailable, using heuristics: %s", e)
+            self.error = e
+            return None
+
+    @property
+    def model(self):
+        """The loaded classifier (loading it on first use), or None"""
+        return self.load()
+
+    @property
+    def classes(self):
+        return [] if self.model is None else [str(name) for name in self.model.classes_]
+
+    def predict_proba(self, matrix):
+        """Class probabilities for an (n_tracks, MODEL_WIDTH) matrix, or None without a model"""
+        if self.model is None:
+            return None
+        return self.model.predict_proba(np.atleast_2d(matrix))
+
+    def predict(self, features_list):
+        """Most likely genre for each features dict, or None without a model"""
+        if not features_list:
+            return []
+        probabilities = self.predict_proba(feature_matrix(features_list))
+        if probabilities is None:
+            return None
+        classes = self.classes
+        return [classes[i] for i in np.argmax(probabilities, axis=1)]
+
@@ -0,0 +1,46 @@
+import numpy as np
+
+PITCH_CLASSES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+
+# Krumhansl-Kessler probe-tone profiles for C major and C minor
+MAJOR_PROFILE = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+MINOR_PROFILE = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+
+# Major keys keep their bare names ('C'), as analyze_song has always reported them
+KEY_NAMES = PITCH_CLASSES + [f"{name}m" for name in PITCH_CLASSES]
+
+
+def _standardize(x, axis=-1):
+    # Zero mean, unit norm along axis, so a dot product is a Pearson correlation
+    x = x - np.mean(x, axis=axis, keepdims=True)
+    norm = np.linalg.norm(x, axis=axis, keepdims=True)
+    return x / np.where(norm == 0, 1, norm)
+
+
+def _profile_matrix():
+    # Row i is a profile rotated to tonic i: 12 major rows, then 12 minor rows
+    rotations = [np.roll(profile, i) for profile in (MAJOR_PROFILE, MINOR_PROFILE) for i in range(12)]
+    return _standardize(np.array(rotations))
+
+
+# 24x12 standardized key profiles, built once at import
+KEY_PROFILES = _profile_matrix()
+
+
+def score_keys(chroma):
+    """Correlation of chroma vector(s) with all 24 key profiles
+
+    chroma has shape (12,) or (n_tracks, 12); the result has shape (24,) or
+    (n_tracks, 24), scored with a single matrix product.
+    """
+    return _standardize(np.asarray(chroma, dtype=np.float64)) @ KEY_PROFILES.T
+
+
+def estimate_keys(chroma):
+    """Best key name for each row of an (n_tracks, 12) chroma matrix"""
+    return [KEY_NAMES[i] for i in np.argmax(score_keys(np.atleast_2d(chroma)), axis=1)]
+
+
+def estimate_key(chroma):
+    """Best key name for a single (12,) chroma vector"""
+    return estimate_keys(chroma)[0]
@@ -0,0 +1,50 @@
+import importlib
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Default on-disk cache for numba's compiled functions, shared by every worker
+NUMBA_CACHE_DIR = os.path.join('cache', 'numba')
+
+
+class LazyModule:
+    """Stand-in for a heavy module that imports it on first attribute access
+
+    Importing librosa pulls in scipy and numba, which costs seconds. Modules
+    bind these proxies instead, so importing the package (and the web app)
+    stays fast and the real import happens with the first analysis or warmup.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        # Only called for attributes not set in __init__; import_module holds the import lock
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+librosa = LazyModule('librosa')
+soundfile = LazyModule('soundfile')
+soxr = LazyModule('soxr')
+
+
+def configure_numba_cache(path=None):
+    """Point numba's on-disk JIT cache at a persistent directory shared across workers
+
+    Must run before librosa (and so numba) is imported; an existing
+    NUMBA_CACHE_DIR environment variable wins. Returns the directory in use.
+    """
+    path = os.environ.setdefault('NUMBA_CACHE_DIR', os.path.abspath(path or NUMBA_CACHE_DIR))
+    if 'numba' in sys.modules:
+        logger.warning("numba was imported before its cache directory was set; %s may be ignored", path)
+    os.makedirs(path, exist_ok=True)
+    return path
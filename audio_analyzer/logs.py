@@ -0,0 +1,141 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_MODES = ('debug', 'production')
+
+
+class SamplingFilter(logging.Filter):
+    """Let through one in every `every` records below INFO, counted per message template
+
+    With %-style logging a call site always passes the same template, so each
+    per-stage debug line shows up once every `every` analyses. INFO and above
+    always pass.
+    """
+
+    def __init__(self, every):
+        super().__init__()
+        self.every = every
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.INFO:
+            return True
+        if self.every <= 0:
+            return False
+        key = (record.name, record.msg)
+        with self._lock:
+            count = self._seen.get(key, 0)
+            self._seen[key] = count + 1
+        return count % self.every == 0
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves all message formatting to the listener thread
+
+    The stock handler formats each record in the calling thread before
+    queueing it; here the caller only pays for an enqueue. Arguments must not
+    be mutated after the logging call.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def _start_listener(handlers, sample_every):
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_every))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return queue_handler, listener
+
+
+def configure_logging(mode='debug', path='app.log', max_bytes=10 * 1024 * 1024, backups=5, sample_every=100):
+    """Set up root logging for the app and its analysis workers
+
+    'debug' logs everything at DEBUG straight to the console and path.
+    'production' logs INFO and above (plus one in sample_every of the
+    analyzer's DEBUG lines) through a queue, so request threads never wait on
+    I/O. A listener thread writes to the console and a size-rotated path.
+    Returns the QueueListener, or None in debug mode.
+    """
+    if mode not in LOG_MODES:
+        raise ValueError(f"Unknown log mode: {mode} (expected one of {', '.join(LOG_MODES)})")
+
+    if mode == 'debug':
+        logging.basicConfig(
+            level=logging.DEBUG,
+            format=LOG_FORMAT,
+            handlers=[
+                logging.StreamHandler(),  # Console output
+                logging.FileHandler(path)  # File output
+            ]
+        )
+        return None
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler(), logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups)]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    queue_handler, listener = _start_listener(handlers, sample_every)
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(logging.INFO)
+    # Our own DEBUG lines reach the sampling filter; third-party DEBUG output (numba) does not
+    logging.getLogger('audio_analyzer').setLevel(logging.DEBUG)
+
+    def restart_in_child():
+        # A forked worker inherits the queue but not the listener thread that drains it
+        root.handlers = [_start_listener(handlers, sample_every)[0]]
+
+    os.register_at_fork(after_in_child=restart_in_child)
+    return listener
+
+
+class _Forward(logging.Handler):
+    """Hand records logged in worker processes to this process's loggers"""
+
+    def emit(self, record):
+        logging.getLogger(record.name).handle(record)
+
+
+# (pid, queue) that this process's worker processes log through
+_worker_logs = None
+
+
+def worker_log_options(context):
+    """Logging options for worker processes started from a multiprocessing context
+
+    Worker processes start from a fresh interpreter without this process's
+    logging setup, so configure_worker_logging points them at a queue that a
+    listener thread here drains into this process's own handlers, at the
+    levels in effect here. The queue and listener are shared by every pool.
+    """
+    global _worker_logs
+    if _worker_logs is None or _worker_logs[0] != os.getpid():
+        log_queue = context.Queue()
+        listener = logging.handlers.QueueListener(log_queue, _Forward())
+        listener.start()
+        atexit.register(listener.stop)
+        _worker_logs = (os.getpid(), log_queue)
+    return {
+        'queue': _worker_logs[1],
+        'level': logging.getLogger().getEffectiveLevel(),
+        'analyzer_level': logging.getLogger('audio_analyzer').getEffectiveLevel(),
+    }
+
+
+def configure_worker_logging(options):
+    """Send this worker process's log records to the process that made options (see worker_log_options)"""
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(options['queue'])]
+    root.setLevel(options['level'])
+    logging.getLogger('audio_analyzer').setLevel(options['analyzer_level'])
@@ -0,0 +1,118 @@
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Analysis stages in pipeline order; preview and streaming runs use a subset
+STAGES = ['fingerprint', 'decode', 'trim', 'stream', 'spectrogram', 'tempo', 'key', 'segments',
+          'mfcc', 'spectral', 'zcr', 'rolloff', 'genre']
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 60.0)
+
+
+class StageTimer:
+    """Accumulate wall-clock seconds (and optionally CPU seconds) per analysis stage
+
+    A stage entered more than once (e.g. once per preview excerpt) adds up.
+    While tracemalloc is tracing, each stage's allocations are audited too:
+    memory[stage] holds the peak bytes allocated above the stage's starting
+    point, i.e. its largest set of live temporaries and results (the maximum
+    if the stage is entered more than once).
+    """
+
+    def __init__(self, cpu=False):
+        self.wall = {}
+        self.cpu = {} if cpu else None
+        self.memory = {} if tracemalloc.is_tracing() else None
+
+    @contextmanager
+    def stage(self, name):
+        if self.memory is not None:
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.wall[name] = self.wall.get(name, 0.0) + time.perf_counter() - wall
+            if self.cpu is not None:
+                self.cpu[name] = self.cpu.get(name, 0.0) + time.process_time() - cpu
+            if self.memory is not None:
+                peak = tracemalloc.get_traced_memory()[1] - start
+                self.memory[name] = max(self.memory.get(name, 0), peak)
+
+    def as_dict(self):
+        """JSON-ready {stage: seconds} in pipeline order"""
+        return {name: round(self.wall[name], 4) for name in sorted(self.wall, key=_stage_order)}
+
+    def memory_report(self):
+        """Human-readable per-stage allocation peaks in MB, or '' when not auditing"""
+        if not self.memory:
+            return ''
+        return ', '.join(f"{name}={self.memory[name] / 2 ** 20:.1f}MB" for name in sorted(self.memory, key=_stage_order))
+
+
+def _stage_order(name):
+    return STAGES.index(name) if name in STAGES else len(STAGES)
+
+
+def _format(value):
+    return '+Inf' if value == float('inf') else repr(float(value))
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram with one label"""
+
+    def __init__(self, name, help_text, label, buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, value):
+        with self._lock:
+            counts, total = self._series.get(label_value, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._series[label_value] = (counts, total + value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted(self._series.items(), key=lambda item: _stage_order(item[0]))
+            for label_value, (counts, total) in series:
+                label = f'{self.label}="{label_value}"'
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{{{label},le="{_format(bound)}"}} {count}')
+                lines.append(f"{self.name}_sum{{{label}}} {total!r}")
+                lines.append(f"{self.name}_count{{{label}}} {counts[-1]}")
+        return lines
+
+
+class AnalysisMetrics:
+    """Stage timings of finished analyses, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self.stages = Histogram('analysis_stage_seconds', 'Time spent in each analysis stage', 'stage')
+        self.totals = Histogram('analysis_seconds', 'Total analysis time by mode', 'mode')
+
+    def observe(self, results):
+        """Record the 'timings' of an analysis result (cache hits carry none)"""
+        timings = (results or {}).get('timings')
+        if not timings:
+            return
+        for stage, seconds in timings.items():
+            self.stages.observe(stage, seconds)
+        self.totals.observe(results.get('mode', 'full'), sum(timings.values()))
+
+    def render(self, gauges=None, counters=None):
+        """Exposition text for the histograms plus {name: (help, value)} gauges and counters"""
+        lines = self.stages.render() + self.totals.render()
+        for kind, values in (('gauge', gauges), ('counter', counters)):
+            for name, (help_text, value) in (values or {}).items():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,63 @@
+import logging
+
+import numpy as np
+
+from .decoders import DEFAULT_SR, decode, source_duration
+from .preview import excerpt_offsets
+
+logger = logging.getLogger(__name__)
+
+# Length of the excerpt taken from the middle of each track, in seconds
+EXCERPT_DURATION = 30.0
+# Tracks stacked per batch; the shared STFT takes roughly 20 MB per track at 22050 Hz
+BATCH_SIZE = 8
+
+
+def load_stack(paths, sr=DEFAULT_SR, length=EXCERPT_DURATION):
+    """Decode a centered excerpt of each file into one zero-padded (n_tracks, samples) array
+
+    Returns (stack, lengths in samples, decoder names). A file that cannot be
+    decoded keeps an all-zero row of length 0 and decoder None, so rows stay
+    aligned with paths.
+    """
+    excerpts, decoders = [], []
+    for path in paths:
+        try:
+            offset = excerpt_offsets(source_duration(path, path), count=1, length=length)[0]
+            y, _, decoder = decode(path, path, sr, offset, length)
+        except Exception as e:
+            logger.warning("Could not decode %s for batch analysis: %s", path, e)
+            y, decoder = np.zeros(0, dtype=np.float32), None
+        excerpts.append(y)
+        decoders.append(decoder)
+
+    lengths = np.array([len(y) for y in excerpts])
+    stack = np.zeros((len(excerpts), max(lengths.max(initial=0), 1)), dtype=np.float32)
+    for row, y in zip(stack, excerpts):
+        row[:len(y)] = y
+    return stack, lengths, decoders
+
+
+def masked_stats(frames, counts):
+    """Per-track mean and standard deviation over the first counts[i] frames of each track
+
+    frames has shape (n_tracks, n_features, n_frames); both results have
+    shape (n_tracks, n_features). Padding frames past a track's end are ignored.
+    """
+    mask = (np.arange(frames.shape[-1]) < np.asarray(counts)[:, np.newaxis])[:, np.newaxis, :]
+    total = np.maximum(counts, 1)[:, np.newaxis]
+    mean = np.sum(frames * mask, axis=-1, dtype=np.float64) / total
+    var = np.sum((frames - mean[..., np.newaxis]) ** 2 * mask, axis=-1) / total
+    return mean, np.sqrt(var)
+
+
+def chunks(items, size=BATCH_SIZE):
+    """Consecutive lists of up to size items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
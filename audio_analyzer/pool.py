@@ -0,0 +1,206 @@
+import importlib
+import logging
+import multiprocessing
+import os
+import threading
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .analyzer import MusicAnalyzer, analysis_version
+from .cache import ResultCache
+from .fingerprint import FingerprintIndex
+from .genre import GenreModel
+from .logs import configure_worker_logging, worker_log_options
+from .store import FeatureStore
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('thread', 'process')
+
+# One analyzer per process: shared by threads, or built by each pool worker
+_analyzer = None
+
+# Warmup tasks of the most recently created executor, for readiness checks
+_warmups = []
+# Why this worker process failed to warm up, reported by _ping
+_warmup_error = None
+
+# Heavy imports happen once per process, on one thread at a time (see prepare)
+_prepare_lock = threading.Lock()
+_prepared = False
+
+# Worker processes start from a clean interpreter, never a fork of a parent that may be
+# holding locks (an import in progress on another thread, a logging handler, SQLite)
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def build_analyzer(options=None):
+    """Create a MusicAnalyzer from a picklable options dict
+
+    Recognised options: cache_path, cache_entries, rates, float32, drop_gaps, store_path, fingerprint_path,
+    genre_model_path (opt in to the trained genre model), audit (trace per-stage allocations with tracemalloc in this process).
+    """
+    options = options or {}
+    if options.get('audit') and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    rates = options.get('rates')
+    float32 = options.get('float32', False)
+    drop_gaps = options.get('drop_gaps', False)
+    genre_model_path = options.get('genre_model_path')
+    version = analysis_version(rates, float32, drop_gaps, bool(genre_model_path))
+    cache = None
+    if options.get('cache_path'):
+        cache = ResultCache(options['cache_path'], version,
+                            max_entries=options.get('cache_entries', 10000))
+    store = FeatureStore(options['store_path']) if options.get('store_path') else None
+    fingerprints = None
+    if options.get('fingerprint_path'):
+        fingerprints = FingerprintIndex(options['fingerprint_path'], version)
+    return MusicAnalyzer(cache=cache, rates=rates, store=store, fingerprints=fingerprints,
+                         genre_model=GenreModel(genre_model_path), float32=float32, drop_gaps=drop_gaps)
+
+
+def init_worker(options=None, warm=True):
+    """Create this process's analyzer, optionally importing librosa and warming its JIT caches
+
+    A 'log' option (from logs.worker_log_options) first sends this process's
+    log records back to the process that started it.
+    """
+    global _analyzer, _warmup_error
+    if options and options.get('log'):
+        configure_worker_logging(options['log'])
+    _analyzer = build_analyzer(options)
+    if warm:
+        try:
+            elapsed = _warm()
+            logger.info("Analysis worker %s warmed up in %.2fs", os.getpid(), elapsed)
+        except Exception as e:
+            # Keep the worker (analyses report their own errors) but fail its readiness ping
+            logger.error("Warmup failed in worker %s: %s", os.getpid(), e, exc_info=True)
+            _warmup_error = e
+
+
+def prepare():
+    """Import librosa and load the genre model, once per process, on the calling thread
+
+    Two threads importing scipy for the first time at once can leave one of
+    them with a partially initialized module, so every analysis thread waits
+    here until the first has imported everything.
+    """
+    global _prepared
+    with _prepare_lock:
+        if not _prepared:
+            importlib.import_module('librosa')
+            _analyzer.genre_model.load()
+            _prepared = True
+
+
+def _warm():
+    # Imports, genre model and every analysis path; raises if any of them is unusable
+    prepare()
+    model = _analyzer.genre_model
+    if model.path is not None and model.model is None:
+        raise RuntimeError(f"Genre model could not be loaded: {model.error}")
+    return _analyzer.warmup(genre_model=True)
+
+
+def _worker_analyzer():
+    if _analyzer is None:
+        init_worker(warm=False)
+    prepare()
+    return _analyzer
+
+
+def summarize(results):
+    """The key, BPM and genre (plus preview confidence and stage timings) the web API returns"""
+    if not results:
+        raise RuntimeError('Failed to analyze audio file')
+    summary = {
+        'key': results['key'],
+        'bpm': results['bpm'],
+        'genre': results['genre']
+    }
+    for optional in ('mode', 'confidence', 'segments', 'decoder', 'trimmed', 'fingerprint_match', 'timings'):
+        if optional in results:
+            summary[optional] = results[optional]
+    return summary
+
+
+def analyze_file(audio_path, cleanup=False, streaming=False):
+    """Analyze a file in the current worker and return key, BPM and genre"""
+    analyzer = _worker_analyzer()
+    try:
+        return summarize(analyzer.analyze_song(audio_path, streaming=streaming))
+    finally:
+        if cleanup and os.path.exists(audio_path):
+            logger.info("Cleaning up file: %s", audio_path)
+            os.remove(audio_path)
+
+
+def analyze_path(audio_path):
+    """Run analyze_song on a file in the current worker and return its full result (None on failure)"""
+    return _worker_analyzer().analyze_song(audio_path)
+
+
+def analyze_batch(audio_paths):
+    """Run analyze_excerpts on several files in the current worker; one result (or None) per file"""
+    return _worker_analyzer().analyze_excerpts(audio_paths)
+
+
+def analyze_data(data, filename, fast=False, segments=False):
+    """Analyze in-memory audio bytes in the current worker and return key, BPM and genre"""
+    return summarize(_worker_analyzer().analyze_song(filename, data, fast=fast, segments=segments))
+
+
+def _ping():
+    if _warmup_error is not None:
+        raise RuntimeError(f"Warmup failed in worker {os.getpid()}: {_warmup_error}")
+    return os.getpid()
+
+
+def _warm_shared():
+    # Thread backend warmup: runs on one analysis thread so startup never waits; analyses
+    # submitted meanwhile wait in prepare(), and a failure is left for warmup_status()
+    try:
+        elapsed = _warm()
+    except Exception as e:
+        logger.error("Warmup failed: %s", e, exc_info=True)
+        raise
+    logger.info("Analysis threads warmed up in %.2fs", elapsed)
+    return os.getpid()
+
+
+def warmup_status():
+    """'ready', 'warming' or 'failed' for the workers of the last created executor"""
+    if not all(future.done() for future in _warmups):
+        return 'warming'
+    if any(future.exception() is not None for future in _warmups):
+        return 'failed'
+    return 'ready'
+
+
+def create_executor(backend='thread', max_workers=2, options=None):
+    """Create the executor that runs analyze_file calls for the given backend"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown analysis backend: {backend} (expected one of {', '.join(BACKENDS)})")
+
+    global _warmups
+    if backend == 'thread':
+        # Threads share this process's analyzer; librosa is imported and warmed on one analysis thread
+        init_worker(options, warm=False)
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis')
+        _warmups = [executor.submit(_warm_shared)]
+        return executor
+
+    context = multiprocessing.get_context(START_METHOD)
+    if START_METHOD == 'forkserver':
+        # The fork server imports the analysis modules once, so each worker does not repeat it
+        context.set_forkserver_preload([__name__])
+    # Workers log through this process's handlers, or their output (and the allocation audit) is lost
+    options = dict(options or {}, log=worker_log_options(context))
+    executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                                   initializer=init_worker, initargs=(options,))
+    # Start every worker now so imports and warmup happen before the first upload
+    _warmups = [executor.submit(_ping) for _ in range(max_workers)]
+    logger.info("Started %s analysis worker processes", max_workers)
+    return executor
@@ -0,0 +1,65 @@
+from collections import Counter
+
+import numpy as np
+
+from .decoders import DEFAULT_SR, decode, decoders_for, source_duration, temporary_path
+
+EXCERPT_COUNT = 3
+EXCERPT_DURATION = 20.0
+# Excerpt BPMs within this fraction of the median count as agreeing
+BPM_TOLERANCE = 0.04
+
+SCALAR_FEATURES = [
+    'spectral_centroid_mean', 'spectral_centroid_std',
+    'zcr_mean', 'zcr_std',
+    'rolloff_mean', 'rolloff_std',
+]
+
+
+def excerpt_offsets(duration, count=EXCERPT_COUNT, length=EXCERPT_DURATION):
+    """Start times of excerpts spread evenly through a track, away from intro and outro"""
+    if duration <= length:
+        return [0.0]
+    offsets = []
+    for i in range(count):
+        center = duration * (i + 1) / (count + 1)
+        offsets.append(min(duration - length, max(0.0, center - length / 2)))
+    return offsets
+
+
+def load_excerpts(audio_path, data=None, sr=DEFAULT_SR, count=EXCERPT_COUNT, length=EXCERPT_DURATION):
+    """Decode only the excerpts a preview needs; returns (excerpts, track duration, decoder name)"""
+    if data is not None and not decoders_for(audio_path):
+        # Only the librosa fallback can read this format; one temporary file serves every excerpt
+        with temporary_path(data, audio_path) as path:
+            return load_excerpts(path, None, sr, count, length)
+
+    source = data if data is not None else audio_path
+    duration = source_duration(source, audio_path)
+    excerpts = []
+    for offset in excerpt_offsets(duration, count, length):
+        y, _, decoder = decode(source, audio_path, sr, offset, length)
+        excerpts.append(y)
+    return excerpts, duration, decoder
+
+
+def combine_excerpts(excerpt_features):
+    """Merge per-excerpt features into one features dict with a confidence in [0, 1]
+
+    BPM is the median over excerpts and the key is a majority vote. The
+    confidence is the average share of excerpts agreeing with each.
+    """
+    bpms = np.array([features['bpm'] for features in excerpt_features])
+    bpm = float(np.median(bpms))
+    bpm_agreement = float(np.mean(np.abs(bpms - bpm) <= BPM_TOLERANCE * bpm))
+
+    key, votes = Counter(features['key'] for features in excerpt_features).most_common(1)[0]
+    key_agreement = votes / len(excerpt_features)
+
+    combined = {'bpm': bpm, 'key': key}
+    for name in ('chroma_mean', 'mfcc_mean', 'mfcc_std'):
+        combined[name] = np.mean([features[name] for features in excerpt_features], axis=0).tolist()
+    for name in SCALAR_FEATURES:
+        combined[name] = float(np.mean([features[name] for features in excerpt_features]))
+    combined['confidence'] = round((bpm_agreement + key_agreement) / 2, 2)
+    return combined
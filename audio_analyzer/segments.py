@@ -0,0 +1,72 @@
+import numpy as np
+
+from . import key
+
+# Sliding analysis window and step, in seconds
+SEGMENT_WINDOW = 30.0
+SEGMENT_HOP = 5.0
+# Relative BPM change between windows that counts as a tempo change
+TEMPO_CHANGE = 0.04
+
+
+def window_means(frames, window, hop):
+    """Mean of (..., n_frames) over sliding windows, from one cumulative sum
+
+    Returns (means with shape (..., n_windows), window start frames). A
+    signal shorter than one window yields a single window over all frames.
+    """
+    n_frames = frames.shape[-1]
+    window = max(1, min(window, n_frames))
+    hop = max(1, hop)
+    cumsum = np.cumsum(frames, axis=-1, dtype=np.float64)
+    cumsum = np.concatenate([np.zeros(frames.shape[:-1] + (1,)), cumsum], axis=-1)
+    starts = np.arange(0, n_frames - window + 1, hop)
+    return (cumsum[..., starts + window] - cumsum[..., starts]) / window, starts
+
+
+def _frames(seconds, sr, hop_length):
+    return int(round(seconds * sr / hop_length))
+
+
+def key_curve(chroma, sr, hop_length, window=SEGMENT_WINDOW, hop=SEGMENT_HOP):
+    """Key of each sliding window of a chromagram; returns (start times, key names)"""
+    means, starts = window_means(chroma, _frames(window, sr, hop_length), _frames(hop, sr, hop_length))
+    return starts * hop_length / sr, key.estimate_keys(means.T)
+
+
+def tempo_curve(tempo_estimator, window=SEGMENT_WINDOW, hop=SEGMENT_HOP):
+    """Tempo of each sliding window of a track's tempogram; returns (start times, BPMs)"""
+    sr, hop_length = tempo_estimator.sr, tempo_estimator.hop_length
+    means, starts = window_means(
+        tempo_estimator.tempogram, _frames(window, sr, hop_length), _frames(hop, sr, hop_length)
+    )
+    return starts * hop_length / sr, tempo_estimator.columns(means)
+
+
+def change_points(times, values, changed):
+    """[{'time', 'value'}] wherever changed(previous, current) holds"""
+    return [
+        {'time': round(float(times[i]), 2), 'value': values[i]}
+        for i in range(1, len(values)) if changed(values[i - 1], values[i])
+    ]
+
+
+def track_segments(chroma, chroma_sr, chroma_hop, tempo_estimator, window=SEGMENT_WINDOW, hop=SEGMENT_HOP, offset=0.0):
+    """Windowed key and tempo curves with their change points, as JSON-ready lists
+
+    offset (seconds) is added to every time, for signals that start part way into the track.
+    """
+    key_times, keys = key_curve(chroma, chroma_sr, chroma_hop, window, hop)
+    tempo_times, bpms = tempo_curve(tempo_estimator, window, hop)
+    key_times, tempo_times = key_times + offset, tempo_times + offset
+    bpms = [round(float(bpm), 1) for bpm in bpms]
+    return {
+        'window': window,
+        'hop': hop,
+        'key_times': [round(float(t), 2) for t in key_times],
+        'keys': keys,
+        'key_changes': change_points(key_times, keys, lambda a, b: a != b),
+        'tempo_times': [round(float(t), 2) for t in tempo_times],
+        'bpms': bpms,
+        'tempo_changes': change_points(tempo_times, bpms, lambda a, b: abs(b - a) > TEMPO_CHANGE * a),
+    }
@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import tempfile
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Stored feature columns and their widths, in row layout order
+COLUMNS = {
+    'bpm': 1,
+    'chroma_mean': 12,
+    'mfcc_mean': 13,
+    'mfcc_std': 13,
+    'spectral_centroid_mean': 1,
+    'spectral_centroid_std': 1,
+    'zcr_mean': 1,
+    'zcr_std': 1,
+    'rolloff_mean': 1,
+    'rolloff_std': 1,
+}
+
+DTYPE = np.float32
+
+
+def _offsets():
+    offsets, start = {}, 0
+    for name, width in COLUMNS.items():
+        offsets[name] = (start, start + width)
+        start += width
+    return offsets, start
+
+
+COLUMN_SLICES, ROW_WIDTH = _offsets()
+
+
+def _atomic_save(path, array):
+    # Write next to the target and rename, so readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
+class FeatureStore:
+    """Columnar on-disk store of extracted features, keyed by content hash
+
+    Every column is an (n_tracks, width) float32 .npy file that readers open
+    memory-mapped, and tracks.json lists the content hash of each row. New
+    tracks are written as single-row files under pending/ (safe from any
+    number of worker processes) and folded into the columns by compact().
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.pending_dir = os.path.join(root, 'pending')
+        os.makedirs(self.pending_dir, exist_ok=True)
+
+    def _column_path(self, name):
+        return os.path.join(self.root, f"{name}.npy")
+
+    def _index_path(self):
+        return os.path.join(self.root, 'tracks.json')
+
+    @staticmethod
+    def to_row(features):
+        """Flatten a features dict into one float32 row in column order"""
+        row = np.empty(ROW_WIDTH, dtype=DTYPE)
+        for name, (start, stop) in COLUMN_SLICES.items():
+            row[start:stop] = features[name]
+        return row
+
+    @staticmethod
+    def from_row(row):
+        """Rebuild a features dict (without the key) from a stored row"""
+        features = {}
+        for name, (start, stop) in COLUMN_SLICES.items():
+            values = [float(value) for value in row[start:stop]]
+            features[name] = values[0] if COLUMNS[name] == 1 else values
+        return features
+
+    def put(self, content_hash, features):
+        """Record the features of one track"""
+        _atomic_save(os.path.join(self.pending_dir, f"{content_hash}.npy"), self.to_row(features))
+
+    def hashes(self):
+        """Content hashes of the compacted rows, in row order"""
+        if not os.path.exists(self._index_path()):
+            return []
+        with open(self._index_path(), encoding='utf-8') as f:
+            return json.load(f)
+
+    def column(self, name):
+        """Memory-mapped (n_tracks, width) array of one column over all compacted rows"""
+        if not os.path.exists(self._column_path(name)):
+            return np.empty((0, COLUMNS[name]), dtype=DTYPE)
+        return np.load(self._column_path(name), mmap_mode='r')
+
+    def pending_count(self):
+        """Number of rows waiting to be compacted"""
+        with os.scandir(self.pending_dir) as entries:
+            return sum(1 for entry in entries if entry.name.endswith('.npy'))
+
+    def compact(self, min_pending=1):
+        """Fold pending rows into the column files; returns the number of rows added
+
+        Does nothing while fewer than min_pending rows are waiting. Run from
+        one process at a time (e.g. after a batch scan).
+        """
+        pending = sorted(name for name in os.listdir(self.pending_dir) if name.endswith('.npy'))
+        if not pending or len(pending) < min_pending:
+            return 0
+
+        hashes = self.hashes()
+        positions = {content_hash: i for i, content_hash in enumerate(hashes)}
+        rows = np.empty((0, ROW_WIDTH), dtype=DTYPE)
+        if hashes:
+            # Columns can outrun the index if a previous compaction was interrupted
+            rows = np.concatenate([np.asarray(self.column(name)[:len(hashes)]) for name in COLUMNS], axis=1)
+
+        new_rows = []
+        for name in pending:
+            content_hash = name[:-len('.npy')]
+            row = np.load(os.path.join(self.pending_dir, name))
+            if content_hash in positions:
+                # Re-analyzed track: overwrite its row in place
+                rows[positions[content_hash]] = row
+            else:
+                positions[content_hash] = len(hashes)
+                hashes.append(content_hash)
+                new_rows.append(row)
+        if new_rows:
+            rows = np.concatenate([rows, np.array(new_rows, dtype=DTYPE)])
+
+        for name, (start, stop) in COLUMN_SLICES.items():
+            _atomic_save(self._column_path(name), np.ascontiguousarray(rows[:, start:stop]))
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(hashes, f)
+        os.replace(tmp_path, self._index_path())
+
+        for name in pending:
+            os.remove(os.path.join(self.pending_dir, name))
+        logger.info("Compacted %s pending rows into %s stored tracks", len(pending), len(hashes))
+        return len(pending)
+
+
+def rescore(store, analyzer):
+    """Re-derive key and genre for every compacted track without decoding audio
+
+    Keys are scored in one batch over the memory-mapped chroma column and
+    genres in one batch through analyzer.predict_genres. Yields
+    (content_hash, key, genre).
+    """
+    from .key import estimate_keys
+
+    hashes = store.hashes()
+    if not hashes:
+        return
+    keys = estimate_keys(store.column('chroma_mean'))
+    rows = np.concatenate([store.column(name) for name in COLUMNS], axis=1)
+    genres = analyzer.predict_genres([store.from_row(row) for row in rows])
+    yield from zip(hashes, keys, genres)
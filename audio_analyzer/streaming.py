@@ -0,0 +1,131 @@
+import numpy as np
+
+from .decoders import DEFAULT_SR
+from .features import HOP_LENGTH, N_FFT, FeatureEngine
+from .lazy import librosa, soxr
+from .lazy import soundfile as sf
+
+# Frames per streamed block (~6 s at 22050 Hz); memory use is bounded by this
+BLOCK_LENGTH = 256
+
+
+class RunningMoments:
+    """Running mean and standard deviation over frames, merged batch by batch"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = None
+        self.m2 = None
+
+    def update(self, frames):
+        """Fold in a (..., n_frames) array of new observations"""
+        n = frames.shape[-1]
+        if n == 0:
+            return
+        batch_mean = np.mean(frames, axis=-1, dtype=np.float64)
+        batch_m2 = np.sum((frames - batch_mean[..., np.newaxis]) ** 2, axis=-1)
+        if self.count == 0:
+            self.count, self.mean, self.m2 = n, batch_mean, batch_m2
+            return
+        # Chan et al. pairwise update keeps the variance numerically stable
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean = self.mean + delta * n / total
+        self.m2 = self.m2 + batch_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+
+    @property
+    def std(self):
+        # Population standard deviation, matching np.std
+        return np.sqrt(self.m2 / self.count)
+
+
+class StreamingFeatures:
+    """Accumulate track-level feature statistics one streamed block at a time"""
+
+    def __init__(self, sr, n_fft=N_FFT, hop_length=HOP_LENGTH):
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.tuning = None
+        self.chroma = RunningMoments()
+        self.mfcc = RunningMoments()
+        self.centroid = RunningMoments()
+        self.zcr = RunningMoments()
+        self.rolloff = RunningMoments()
+        # The onset envelope is the only per-frame output kept (one float per hop)
+        self._onset_blocks = []
+        self._last_mel = None
+
+    def update(self, y_block):
+        """Analyze one block of samples from resampled_blocks"""
+        if len(y_block) < self.n_fft:
+            # Too short to hold a single frame (the tail of the file)
+            return
+        engine = FeatureEngine(y_block, self.sr, self.n_fft, self.hop_length, center=False)
+
+        # Estimate tuning once so every block's chroma uses the same reference
+        if self.tuning is None:
+            self.tuning = engine.estimate_tuning()
+        self.chroma.update(engine.chroma(tuning=self.tuning))
+        self.mfcc.update(engine.mfcc())
+        self.centroid.update(engine.spectral_centroid())
+        self.zcr.update(engine.zero_crossing_rate())
+        self.rolloff.update(engine.spectral_rolloff())
+        self._onset_blocks.append(self._onset(engine.mel_db))
+
+    def _onset(self, mel_db):
+        # Prepend the previous block's last frame so the first difference spans the boundary
+        if self._last_mel is None:
+            onset = librosa.onset.onset_strength(S=mel_db, sr=self.sr, center=False)
+        else:
+            frames = np.concatenate([self._last_mel, mel_db], axis=1)
+            onset = librosa.onset.onset_strength(S=frames, sr=self.sr, center=False)[1:]
+        self._last_mel = mel_db[:, -1:]
+        return onset
+
+    def onset_envelope(self):
+        """Onset strength envelope of everything streamed so far"""
+        return np.concatenate(self._onset_blocks)
+
+
+def resampled_blocks(audio_path, sr=DEFAULT_SR, block_length=BLOCK_LENGTH, frame_length=N_FFT, hop_length=HOP_LENGTH):
+    """Mono float32 blocks of a file resampled to sr, framed like librosa.stream
+
+    Each block holds block_length frames, and consecutive blocks overlap by
+    frame_length - hop_length samples so no frame straddles a boundary. The
+    file is decoded by soundfile and resampled with a streaming soxr
+    resampler, so only about one block is held in memory at either rate.
+    """
+    native_sr = sf.info(audio_path).samplerate
+    resampler = None if native_sr == sr else soxr.ResampleStream(native_sr, sr, 1, dtype='float32', quality='HQ')
+    block_samples = frame_length + (block_length - 1) * hop_length
+    step = block_length * hop_length
+    pending = np.zeros(0, dtype=np.float32)
+    for raw in sf.blocks(audio_path, blocksize=step * native_sr // sr, dtype='float32', always_2d=True):
+        y = np.mean(raw, axis=1)
+        if resampler is not None:
+            y = resampler.resample_chunk(y)
+        pending = np.concatenate([pending, y])
+        while len(pending) >= block_samples:
+            yield pending[:block_samples]
+            pending = pending[step:]
+    if resampler is not None:
+        pending = np.concatenate([pending, resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)])
+    # The tail, as shorter blocks
+    while len(pending) >= frame_length:
+        yield pending[:block_samples]
+        pending = pending[step:]
+
+
+def accumulate_stream(audio_path, sr=DEFAULT_SR, block_length=BLOCK_LENGTH, n_fft=N_FFT, hop_length=HOP_LENGTH):
+    """Stream a file block by block at sample rate sr and return the filled StreamingFeatures
+
+    Features are computed at the same rate as an in-memory analysis, so
+    streamed results can share its cache entries, feature store columns and
+    genre model. The file must be readable by soundfile.
+    """
+    accumulator = StreamingFeatures(sr, n_fft, hop_length)
+    for y_block in resampled_blocks(audio_path, sr, block_length, n_fft, hop_length):
+        accumulator.update(y_block)
+    return accumulator
@@ -0,0 +1,54 @@
+import numpy as np
+
+from .features import HOP_LENGTH
+from .lazy import librosa
+
+# Autocorrelation window used by librosa.feature.tempo, in seconds
+AC_SIZE = 8.0
+
+
+def fold_octave(tempo, reference):
+    """tempo doubled or halved until it lies within half an octave of reference"""
+    if tempo <= 0 or reference <= 0:
+        return tempo
+    return float(tempo * 2.0 ** np.round(np.log2(reference / tempo)))
+
+
+class TempoEstimator:
+    """Estimate tempo from one onset envelope and one shared tempogram"""
+
+    def __init__(self, onset_env, sr, hop_length=HOP_LENGTH):
+        self.onset_env = onset_env
+        self.sr = sr
+        self.hop_length = hop_length
+
+        # Same window librosa.feature.tempo would pick, so estimates match its defaults
+        win_length = int(librosa.time_to_frames(AC_SIZE, sr=sr, hop_length=hop_length))
+        self.tempogram = librosa.feature.tempogram(
+            onset_envelope=onset_env, sr=sr, hop_length=hop_length, win_length=win_length
+        )
+
+    def _tempo(self, aggregate, tempogram=None):
+        return librosa.feature.tempo(
+            onset_envelope=self.onset_env,
+            sr=self.sr,
+            hop_length=self.hop_length,
+            tg=self.tempogram if tempogram is None else tempogram,
+            aggregate=aggregate,
+        )
+
+    def primary(self):
+        """Global tempo from the mean tempogram (what beat_track estimates)"""
+        return float(self._tempo(np.mean)[0])
+
+    def secondary(self):
+        """Global tempo from the median tempogram, robust to short tempo excursions
+
+        The median often settles on half or double time, so the estimate is
+        folded into the octave of primary().
+        """
+        return fold_octave(float(self._tempo(np.median)[0]), self.primary())
+
+    def columns(self, tempogram):
+        """Tempo of each column of a tempogram derived from this one (e.g. window averages)"""
+        return self._tempo(None, tempogram)
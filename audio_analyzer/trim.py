@@ -0,0 +1,62 @@
+import numpy as np
+
+# Gate level below the loudest frame; quiet passages of real music stay well above it
+SILENCE_DB = -50.0
+# RMS is measured on every DECIMATION-th sample, over frames of FRAME_DURATION seconds
+DECIMATION = 4
+FRAME_DURATION = 0.1
+# Interior quiet stretches at least this long are dropped when drop_gaps is set
+MIN_GAP = 2.0
+
+
+def frame_rms(y, sr, decimation=DECIMATION, frame_duration=FRAME_DURATION):
+    """RMS of consecutive frame_duration frames of y, measured on a decimated copy
+
+    Returns (rms per frame, frame length in samples of y). The last frame may
+    be shorter; its RMS is taken over the samples it has.
+    """
+    decimated = np.asarray(y[::decimation], dtype=np.float32)
+    frame = max(1, int(frame_duration * sr / decimation))
+    starts = np.arange(0, len(decimated), frame)
+    if not len(starts):
+        return np.zeros(0, dtype=np.float32), frame * decimation
+    energy = np.add.reduceat(np.square(decimated), starts)
+    counts = np.diff(np.append(starts, len(decimated)))
+    return np.sqrt(energy / counts), frame * decimation
+
+
+def audible_spans(y, sr, threshold_db=SILENCE_DB, drop_gaps=False, min_gap=MIN_GAP):
+    """(start, stop) sample ranges of y worth analyzing
+
+    Leading and trailing frames more than threshold_db below the loudest
+    frame are left out; with drop_gaps, so are interior quiet runs of at
+    least min_gap seconds. An all-silent signal is kept whole.
+    """
+    rms, frame = frame_rms(y, sr)
+    if not len(rms) or rms.max() <= 0:
+        return [(0, len(y))]
+    loud = rms > rms.max() * 10 ** (threshold_db / 20)
+    first, last = np.flatnonzero(loud)[[0, -1]]
+    bounds = [first]
+    if drop_gaps:
+        # Runs of quiet frames: +1 steps open them and -1 steps close them
+        quiet = np.concatenate([[0], ~loud[first:last + 1], [0]]).astype(np.int8)
+        steps = np.flatnonzero(np.diff(quiet))
+        for start, stop in zip(steps[::2], steps[1::2]):
+            if (stop - start) * frame >= min_gap * sr:
+                bounds += [first + start, first + stop]
+    bounds.append(last + 1)
+    return [(int(start * frame), int(min(len(y), stop * frame))) for start, stop in zip(bounds[::2], bounds[1::2])]
+
+
+def trim_silence(y, sr, threshold_db=SILENCE_DB, drop_gaps=False, min_gap=MIN_GAP):
+    """y without its silent lead-in and tail (and, with drop_gaps, long interior gaps)
+
+    Returns (trimmed signal, spans kept as (start, stop) samples, seconds removed).
+    """
+    spans = audible_spans(y, sr, threshold_db, drop_gaps, min_gap)
+    if len(spans) == 1:
+        trimmed = y[spans[0][0]:spans[0][1]]
+    else:
+        trimmed = np.concatenate([y[start:stop] for start, stop in spans])
+    return trimmed, spans, (len(y) - len(trimmed)) / sr
@@ -0,0 +1,29 @@
+# Gunicorn settings: a persistent numba JIT cache shared by every worker and restart.
+# Used by the Procfile (gunicorn -c gunicorn.conf.py app:app).
+import os
+
+from audio_analyzer.lazy import configure_numba_cache
+
+# Serving under gunicorn means production logging unless LOG_MODE says otherwise
+os.environ.setdefault('LOG_MODE', 'production')
+
+# Job state lives in memory, so keep a single web process (see README)
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+# The first analysis in a cold worker can take a while if warmup is skipped
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+
+def on_starting(server):
+    """Set up the numba cache directory before anything imports numba
+
+    The master does not warm up: importing librosa here would delay binding
+    by the whole warmup. The analysis workers warm themselves in the
+    background, filling the shared cache on the first start.
+    """
+    path = configure_numba_cache()
+    server.log.info("numba cache directory: %s", path)
+
+
+def post_fork(server, worker):
+    """Make sure the cache env is set in every web worker"""
+    configure_numba_cache()
@@ -0,0 +1,127 @@
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+FINISHED = 'finished'
+FAILED = 'failed'
+
+
+class Job:
+    """State of a single queued analysis"""
+
+    def __init__(self, filename, future):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.future = future
+        self.created = time.time()
+        self.finished = None
+
+    @property
+    def status(self):
+        if self.future.done():
+            return FAILED if self.future.exception() is not None else FINISHED
+        return RUNNING if self.future.running() else QUEUED
+
+    @property
+    def result(self):
+        return self.future.result() if self.status == FINISHED else None
+
+    @property
+    def error(self):
+        return str(self.future.exception()) if self.status == FAILED else None
+
+    def to_dict(self):
+        data = {'job_id': self.id, 'status': self.status, 'filename': self.filename}
+        if data['status'] == FINISHED:
+            data['results'] = self.result
+        elif data['status'] == FAILED:
+            data['error'] = self.error
+        return data
+
+
+class JobQueue:
+    """Submit analysis jobs to an executor and track them by job id"""
+
+    def __init__(self, executor, ttl=3600, on_result=None, admission=None, on_error=None):
+        self.executor = executor
+        self.ttl = ttl
+        # Called with the result of every job that finishes successfully
+        self.on_result = on_result
+        # Called once with the error message of every job that fails
+        self.on_error = on_error
+        # Optional AdmissionController that jobs go through instead of straight to the executor
+        self.admission = admission
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, filename=None, weight=1.0):
+        """Queue func(*args) and return the job id immediately
+
+        With admission control, weight is the job's relative cost and
+        admission.Overloaded is raised when the wait queue is full.
+        """
+        return self.submit_many([(func, args, filename, weight)])[0]
+
+    def submit_many(self, calls):
+        """Queue several (func, args, filename, weight) calls and return their job ids
+
+        With admission control they are admitted together or not at all.
+        """
+        if self.admission is not None:
+            futures = self.admission.submit_many([(func, args, weight) for func, args, _, weight in calls])
+        else:
+            futures = [self.executor.submit(func, *args) for func, args, _, _ in calls]
+        jobs = [Job(filename, future) for (_, _, filename, _), future in zip(calls, futures)]
+        with self._lock:
+            self._prune()
+            for job in jobs:
+                self._jobs[job.id] = job
+        for job in jobs:
+            job.future.add_done_callback(lambda f, job=job: self._done(job))
+            logger.info("Job %s queued for %s", job.id, job.filename)
+        return [job.id for job in jobs]
+
+    def get(self, job_id):
+        """Return the job with the given id, or None if unknown or expired"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def depth(self):
+        """Number of jobs waiting for or holding a worker"""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.future.done())
+
+    def in_flight(self):
+        """Number of jobs currently running on a worker"""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.future.running())
+
+    def _done(self, job):
+        job.finished = time.time()
+        if job.status == FAILED:
+            logger.error("Job %s failed: %s", job.id, job.error)
+            if self.on_error is not None:
+                try:
+                    self.on_error(job.error)
+                except Exception as e:
+                    logger.warning("Error callback failed for job %s: %s", job.id, e)
+        else:
+            logger.info("Job %s finished", job.id)
+            if self.on_result is not None:
+                try:
+                    self.on_result(job.result)
+                except Exception as e:
+                    logger.warning("Result callback failed for job %s: %s", job.id, e)
+
+    def _prune(self):
+        # Forget finished jobs nobody has polled for within the TTL
+        cutoff = time.time() - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished is not None and job.finished < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
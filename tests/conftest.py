@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+# The app modules (admission, jobs) live at the repository root, next to the audio_analyzer package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def click_track(tmp_path):
+    """Write a WAV click track and return its path: click_track(bpm=120, duration=10.0, name=None)"""
+    np = pytest.importorskip('numpy')
+    sf = pytest.importorskip('soundfile')
+
+    def write(bpm=120.0, duration=10.0, sr=22050, name=None, lead_in=0.0):
+        y = np.zeros(int(sr * (lead_in + duration)), dtype=np.float32)
+        t = np.arange(int(sr * 0.02)) / sr
+        click = (np.sin(2 * np.pi * 1000.0 * t) * np.exp(-t * 200)).astype(np.float32)
+        for start in np.arange(lead_in, lead_in + duration, 60.0 / bpm):
+            i = int(start * sr)
+            y[i:i + len(click)] += click[:len(y) - i]
+        path = tmp_path / (name or f"click_{bpm:g}.wav")
+        sf.write(str(path), y, sr)
+        return str(path)
+
+    return write
@@ -0,0 +1,156 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+from admission import (MAX_RETRY_AFTER, MIN_WEIGHT, REFERENCE_BYTES, REFERENCE_DURATION, AdmissionController,
+                       Overloaded, TooLarge, analysis_weight)
+
+
+class ManualExecutor:
+    """Executor whose calls only finish when the test says so"""
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, func, *args):
+        future = Future()
+        future.set_running_or_notify_cancel()
+        self.calls.append((func, args, future))
+        return future
+
+    def finish(self, index, result=None, error=None):
+        future = self.calls[index][2]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+
+def work(*args):
+    return args
+
+
+def test_weight_of_tiny_upload_is_floored():
+    assert analysis_weight(1) == MIN_WEIGHT
+
+
+def test_weight_scales_with_size():
+    assert analysis_weight(2 * REFERENCE_BYTES) == pytest.approx(2.0)
+
+
+def test_weight_uses_duration_when_larger():
+    assert analysis_weight(REFERENCE_BYTES / 4, duration=REFERENCE_DURATION * 3) == pytest.approx(3.0)
+    assert analysis_weight(REFERENCE_BYTES * 2, duration=1.0) == pytest.approx(2.0)
+
+
+def test_runs_up_to_max_in_flight_then_queues():
+    executor = ManualExecutor()
+    admission = AdmissionController(executor, max_in_flight=2, max_queued=2)
+
+    futures = [admission.submit(work, i, weight=1.0) for i in range(3)]
+
+    assert len(executor.calls) == 2
+    assert admission.stats() == (2.0, 2, 1, 0)
+    assert not futures[2].running()
+
+    executor.finish(0, 'done')
+    assert futures[0].result() == 'done'
+    assert len(executor.calls) == 3
+    assert executor.calls[2][1] == (2,)
+
+
+def test_rejects_when_queue_is_full():
+    admission = AdmissionController(ManualExecutor(), max_in_flight=1, max_queued=1)
+    admission.submit(work, weight=1.0)
+    admission.submit(work, weight=1.0)
+
+    assert not admission.has_room()
+    with pytest.raises(Overloaded) as error:
+        admission.submit(work, weight=1.0)
+    assert 1 <= error.value.retry_after <= MAX_RETRY_AFTER
+    assert admission.stats()[3] == 1
+
+
+def test_call_heavier_than_capacity_runs_alone():
+    executor = ManualExecutor()
+    admission = AdmissionController(executor, max_in_flight=1, max_queued=1)
+
+    admission.submit(work, weight=5.0)
+    admission.submit(work, weight=0.1)
+
+    assert len(executor.calls) == 1
+    executor.finish(0)
+    assert len(executor.calls) == 2
+
+
+def test_batch_is_admitted_all_or_nothing():
+    executor = ManualExecutor()
+    admission = AdmissionController(executor, max_in_flight=1, max_queued=2)
+    admission.submit(work, weight=1.0)
+
+    with pytest.raises(Overloaded):
+        admission.submit_many([(work, (i,), 1.0) for i in range(3)])
+    assert admission.stats() == (1.0, 1, 0, 1)
+
+    futures = admission.submit_many([(work, (i,), 1.0) for i in range(2)])
+    assert len(futures) == 2
+    assert admission.stats()[2] == 2
+
+
+def test_batch_that_can_never_fit_is_too_large():
+    admission = AdmissionController(ManualExecutor(), max_in_flight=2, max_queued=2)
+
+    with pytest.raises(TooLarge):
+        admission.submit_many([(work, (i,), 1.0) for i in range(5)])
+    assert admission.stats() == (0.0, 0, 0, 0)
+
+
+def test_errors_reach_the_caller_and_free_capacity():
+    executor = ManualExecutor()
+    admission = AdmissionController(executor, max_in_flight=1, max_queued=1)
+    failing = admission.submit(work, weight=1.0)
+    waiting = admission.submit(work, weight=1.0)
+
+    executor.finish(0, error=ValueError('bad file'))
+
+    assert isinstance(failing.exception(), ValueError)
+    assert waiting.running()
+    assert admission.stats()[:3] == (1.0, 1, 0)
+
+
+def test_cancelled_call_passes_its_turn_on():
+    executor = ManualExecutor()
+    admission = AdmissionController(executor, max_in_flight=1, max_queued=2)
+    admission.submit(work, 0, weight=1.0)
+    cancelled = admission.submit(work, 1, weight=1.0)
+    admission.submit(work, 2, weight=1.0)
+
+    assert cancelled.cancel()
+    executor.finish(0)
+
+    assert [args for _, args, _ in executor.calls] == [(0,), (2,)]
+
+
+def test_call_handed_to_a_busy_executor_can_still_be_cancelled():
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        return release.wait(5)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        admission = AdmissionController(executor, max_in_flight=1, max_queued=2)
+        blocking = admission.submit(block, weight=0.5)
+        waiting = admission.submit(work, 1, weight=0.5)
+
+        assert started.wait(5)
+        assert blocking.running()
+        assert not waiting.running()
+        assert waiting.cancel()
+        assert not blocking.cancel()
+        release.set()
+
+        assert blocking.result(timeout=5) is True
+        assert waiting.cancelled()
+    assert admission.stats()[:3] == (0.0, 0, 0)
@@ -0,0 +1,66 @@
+import importlib
+import io
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('flask')
+
+
+@pytest.fixture(scope='module')
+def app_module(tmp_path_factory):
+    root = tmp_path_factory.mktemp('app')
+    with pytest.MonkeyPatch.context() as patch:
+        for name, value in {'RESULT_CACHE_PATH': '', 'FEATURE_STORE_PATH': '', 'FINGERPRINT_INDEX_PATH': '',
+                            'LOG_FILE': str(root / 'app.log'), 'ANALYSIS_WORKERS': '1', 'MAX_BATCH_MB': '1'}.items():
+            patch.setenv(name, value)
+        yield importlib.import_module('app')
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+def test_batch_over_the_size_limit_is_refused_before_reading(client):
+    files = [(io.BytesIO(b'\0' * (700 * 1024)), f'{i}.wav') for i in range(2)]
+
+    response = client.post('/batch', data={'files': files}, content_type='multipart/form-data')
+
+    assert response.status_code == 413
+    assert 'at most 1MB per batch' in response.get_json()['error']
+
+
+def test_batch_is_turned_away_when_admission_is_full(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module.admission, 'has_room', lambda weight=None: False)
+
+    response = client.post('/batch', data={'files': [(io.BytesIO(b'RIFF'), 'a.wav')]},
+                           content_type='multipart/form-data')
+
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+
+
+def test_metrics_type_rejections_as_a_counter(client):
+    text = client.get('/metrics').get_data(as_text=True)
+
+    assert '# TYPE analysis_admission_rejected_total counter' in text
+    assert '# TYPE analysis_in_flight gauge' in text
+
+
+def test_uploads_over_the_streaming_threshold_are_streamed(app_module, client, monkeypatch):
+    streamed = []
+
+    def queue_streaming_analysis(file, filename):
+        streamed.append(filename)
+        return 'queued', 202
+
+    monkeypatch.setattr(app_module, 'queue_streaming_analysis', queue_streaming_analysis)
+    size = app_module.app.config['STREAMING_THRESHOLD'] + 1024
+
+    assert size <= app_module.app.config['MAX_FILE_SIZE']
+    response = client.post('/upload', data={'file': (io.BytesIO(b'\0' * size), 'mix.wav')},
+                           content_type='multipart/form-data')
+
+    assert response.status_code == 202
+    assert streamed == ['mix.wav']
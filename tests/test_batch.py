@@ -0,0 +1,90 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# The package imports numpy on the way in
+pytest.importorskip('numpy')
+
+from audio_analyzer.batch import ResultWriter, completed_paths, find_audio_files, map_unordered, scan
+
+RESULT = {'key': 'C major', 'bpm': 120.0, 'genre': 'Pop'}
+
+
+class FakeAnalyzer:
+    """Stands in for MusicAnalyzer.analyze_many, recording what it was asked to analyze"""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.analyzed = []
+
+    def analyze_many(self, paths, workers=None, batch_size=None):
+        for path in paths:
+            self.analyzed.append(path)
+            yield path, None if path in self.fail else RESULT
+
+
+def touch(directory, *names):
+    for name in names:
+        path = directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'')
+    return directory
+
+
+def test_find_audio_files_filters_and_sorts(tmp_path):
+    touch(tmp_path, 'b.mp3', 'a.WAV', 'notes.txt', 'sub/c.flac', 'noext')
+
+    found = [path[len(str(tmp_path)) + 1:] for path in find_audio_files(str(tmp_path))]
+
+    assert found == ['a.WAV', 'b.mp3', os.path.join('sub', 'c.flac')]
+
+
+def square(x):
+    if x == 3:
+        raise ValueError('three')
+    return x * x
+
+
+def test_map_unordered_yields_every_item_with_its_error():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = {item: (result, error) for item, result, error in map_unordered(executor, square, range(6), window=2)}
+
+    assert results[2] == (4, None)
+    assert results[3] == (None, 'three')
+    assert len(results) == 6
+
+
+@pytest.mark.parametrize('name', ['results.jsonl', 'results.csv'])
+def test_written_results_are_recognised_as_done(tmp_path, name):
+    output = str(tmp_path / name)
+    with ResultWriter(output) as writer:
+        writer.write('a.wav', RESULT)
+        writer.write('b.wav', None)
+
+    assert completed_paths(output) == {'a.wav', 'b.wav'}
+
+
+def test_interrupted_line_is_redone(tmp_path):
+    output = tmp_path / 'results.jsonl'
+    output.write_text('{"path": "a.wav", "key": "C major"}\n{"path": "b.w')
+
+    assert completed_paths(str(output)) == {'a.wav'}
+    with ResultWriter(str(output)) as writer:
+        writer.write('b.wav', RESULT)
+    assert completed_paths(str(output)) == {'a.wav', 'b.wav'}
+
+
+def test_scan_resumes_where_it_stopped(tmp_path):
+    music = touch(tmp_path / 'music', 'a.wav', 'b.wav', 'c.wav')
+    output = str(tmp_path / 'results.jsonl')
+    with ResultWriter(output) as writer:
+        writer.write(str(music / 'a.wav'), RESULT)
+
+    analyzer = FakeAnalyzer(fail={str(music / 'c.wav')})
+    count = scan(analyzer, str(music), output)
+
+    assert count == 2
+    assert analyzer.analyzed == [str(music / 'b.wav'), str(music / 'c.wav')]
+    # Failures are recorded too, so a rerun has nothing left to do
+    assert scan(FakeAnalyzer(), str(music), output) == 0
@@ -0,0 +1,47 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from audio_analyzer.bench import bench_case, click_track, default_cases, noise, tonal_sequence
+
+
+def test_click_track_has_a_click_on_every_beat():
+    sr = 22050
+    y = click_track(120, 4.0, sr)
+
+    assert y.shape == (4 * sr,)
+    beats = y.reshape(8, sr // 2)
+    assert np.all(np.abs(beats[:, :int(0.02 * sr)]).max(axis=1) > 0.5)
+    assert not np.any(beats[:, int(0.02 * sr):])
+
+
+def test_synthetic_tracks_are_deterministic():
+    np.testing.assert_array_equal(noise(1.0, 8000), noise(1.0, 8000))
+    assert not np.array_equal(noise(1.0, 8000, seed=1), noise(1.0, 8000))
+
+    y = tonal_sequence('Am', 2.0, 22050)
+    np.testing.assert_array_equal(y, tonal_sequence('Am', 2.0, 22050))
+    assert np.max(np.abs(y)) == pytest.approx(1.0)
+
+
+def test_default_cases():
+    cases = default_cases(quick=True)
+
+    assert len({name for name, *_ in cases}) == len(cases)
+    assert {kind for _, kind, *_ in cases} == {'clicks', 'tonal', 'noise'}
+    assert all(duration >= 10.0 for *_, duration, _ in cases)
+
+
+def test_bench_case_reports_stages_and_expectations():
+    pytest.importorskip('librosa')
+    from audio_analyzer import MusicAnalyzer
+    from audio_analyzer.genre import GenreModel
+
+    analyzer = MusicAnalyzer(genre_model=GenreModel(path=None))
+    result = bench_case(analyzer, ('clicks-120bpm', 'clicks', 120, 8.0, 22050), repeat=1)
+
+    assert result['expected_bpm'] == 120
+    assert result['bpm'] == pytest.approx(120, rel=0.05)
+    assert {'tempo', 'key', 'genre'} <= set(result['stages'])
+    assert result['cpu'] > 0
+    assert result['throughput'] > 0
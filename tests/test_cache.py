@@ -0,0 +1,115 @@
+import hashlib
+import sqlite3
+
+import pytest
+
+# The package imports numpy on the way in
+pytest.importorskip('numpy')
+
+from audio_analyzer import cache
+from audio_analyzer.cache import ResultCache, hash_bytes, hash_file
+
+RESULT = {'key': 'C major', 'bpm': 120.0, 'genre': 'Pop'}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() for the cache module"""
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'time', lambda: now[0])
+    return now
+
+
+def stored_keys(path):
+    with sqlite3.connect(path) as conn:
+        return {key for (key,) in conn.execute('SELECT key FROM results')}
+
+
+def test_hashes_agree_for_bytes_and_files(tmp_path):
+    path = tmp_path / 'a.wav'
+    path.write_bytes(b'RIFF' * 1000)
+
+    assert hash_file(str(path)) == hash_bytes(b'RIFF' * 1000) == hashlib.sha256(b'RIFF' * 1000).hexdigest()
+
+
+def test_results_persist_across_instances(tmp_path):
+    path = str(tmp_path / 'results.sqlite3')
+    ResultCache(path, '1').put('abc', RESULT)
+
+    assert ResultCache(path, '1').get('abc') == RESULT
+
+
+def test_versions_and_variants_are_separate(tmp_path):
+    path = str(tmp_path / 'results.sqlite3')
+    results = ResultCache(path, '1')
+    results.put('abc', RESULT, variant='fast')
+
+    assert results.get('abc') is None
+    assert results.get('abc', variant='fast') == RESULT
+    assert ResultCache(path, '2').get('abc', variant='fast') is None
+
+
+def test_memory_keeps_most_recently_used(tmp_path):
+    results = ResultCache(str(tmp_path / 'results.sqlite3'), '1', memory_entries=2)
+    for content_hash in 'abc':
+        results.put(content_hash, RESULT)
+    results.get('b')
+    results.put('d', RESULT)
+
+    assert list(results._memory) == [results.key('b'), results.key('d')]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(cache, 'EVICT_EVERY', 1)
+    path = str(tmp_path / 'results.sqlite3')
+    results = ResultCache(path, '1', max_entries=2, memory_entries=0)
+    results.put('a', RESULT)
+    clock[0] += 1
+    results.put('b', RESULT)
+    clock[0] += cache.TOUCH_INTERVAL + 1
+    # A hit after TOUCH_INTERVAL makes 'a' recent again
+    assert results.get('a') == RESULT
+    clock[0] += 1
+    results.put('c', RESULT)
+
+    assert stored_keys(path) == {results.key('a'), results.key('c')}
+
+
+def test_eviction_waits_for_evict_every_puts(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(cache, 'EVICT_EVERY', 3)
+    path = str(tmp_path / 'results.sqlite3')
+    results = ResultCache(path, '1', max_entries=1)
+    for i, content_hash in enumerate('abcd'):
+        clock[0] += 1
+        results.put(content_hash, RESULT)
+        if i == 1:
+            # The first put evicted; the next two only insert
+            assert len(stored_keys(path)) == 2
+
+    assert stored_keys(path) == {results.key('d')}
+
+
+def test_recent_hit_does_not_write(tmp_path, clock):
+    path = str(tmp_path / 'results.sqlite3')
+    ResultCache(path, '1').put('abc', RESULT)
+    clock[0] += 10
+    ResultCache(path, '1').get('abc')
+
+    with sqlite3.connect(path) as conn:
+        (last_used,) = conn.execute('SELECT last_used FROM results').fetchone()
+    assert last_used == 1000.0
+
+
+def test_analyze_song_answers_repeated_content_from_cache(tmp_path):
+    from audio_analyzer import FAST_VARIANT, MusicAnalyzer, analysis_version
+    from audio_analyzer.genre import GenreModel
+
+    results = ResultCache(str(tmp_path / 'results.sqlite3'), analysis_version())
+    analyzer = MusicAnalyzer(cache=results, genre_model=GenreModel(path=None))
+    # Never decoded: a cache hit returns before any analysis
+    data = b'not really audio'
+    results.put(hash_bytes(data), RESULT)
+    results.put(hash_bytes(data), dict(RESULT, mode=FAST_VARIANT), variant=FAST_VARIANT)
+
+    assert analyzer.analyze_song('a.wav', data) == RESULT
+    assert analyzer.analyze_song('a.wav', data, fast=True)['mode'] == FAST_VARIANT
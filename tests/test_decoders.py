@@ -0,0 +1,112 @@
+import io
+import os
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('soundfile')
+
+from audio_analyzer.decoders import (IN_MEMORY_FORMATS, decode, decoders_for, extension, soundfile_formats, source_duration,
+                                     temporary_path)
+
+
+def test_extension_is_lower_case_without_dot():
+    assert extension('Song.Final.MP3') == 'mp3'
+    assert extension('noext') == ''
+
+
+def test_temporary_path_is_removed_afterwards():
+    with temporary_path(b'data', 'upload.wav') as path:
+        assert path.endswith('.wav')
+        with open(path, 'rb') as f:
+            assert f.read() == b'data'
+    assert not os.path.exists(path)
+
+
+def test_bytes_decode_like_the_file(click_track):
+    path = click_track(120, duration=3.0)
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    from_bytes, sr, decoder = decode(data, 'upload.wav')
+    from_path, _, _ = decode(path, path)
+
+    assert sr == 22050
+    assert decoder == 'soundfile'
+    np.testing.assert_array_equal(from_bytes, from_path)
+
+
+def test_decoders_for_prefers_soundfile():
+    assert decoders_for('song.WAV')[0] == 'soundfile'
+    assert decoders_for('notes.txt') == []
+    assert 'soundfile' not in decoders_for('song.m4a')
+
+
+def test_soundfile_formats_include_mp3_from_libsndfile_1_1():
+    import soundfile
+
+    version = tuple(int(part) for part in soundfile.__libsndfile_version__.split('.')[:2])
+    assert IN_MEMORY_FORMATS <= soundfile_formats()
+    assert ('mp3' in soundfile_formats()) == (version >= (1, 1))
+
+
+def test_decode_offset_and_duration(click_track):
+    path = click_track(120, duration=4.0)
+
+    full, sr, _ = decode(path, path)
+    part, _, _ = decode(path, path, offset=1.0, duration=0.5)
+
+    assert len(part) == sr // 2
+    np.testing.assert_array_equal(part, full[sr:sr + sr // 2])
+
+
+def test_decode_resamples_to_the_analysis_rate(tmp_path):
+    pytest.importorskip('librosa')
+    import soundfile
+
+    path = str(tmp_path / 'hi.wav')
+    soundfile.write(path, np.zeros((44100, 2), dtype=np.float32), 44100)
+
+    y, sr, decoder = decode(path, path)
+
+    assert (sr, decoder) == (22050, 'soundfile')
+    assert y.ndim == 1
+    assert len(y) == 22050
+
+
+def test_source_duration_from_the_header(click_track):
+    path = click_track(120, duration=2.5)
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    assert source_duration(path, path) == pytest.approx(2.5, abs=1e-3)
+    assert source_duration(data, 'upload.wav') == pytest.approx(2.5, abs=1e-3)
+
+
+def test_m4a_decodes_in_process_with_pyav():
+    av = pytest.importorskip('av')
+
+    sr = 22050
+    y = np.zeros(3 * sr, dtype=np.float32)
+    y[::sr // 2] = 0.9
+    buffer = io.BytesIO()
+    with av.open(buffer, 'w', format='mp4') as container:
+        stream = container.add_stream('aac', rate=sr)
+        stream.layout = 'mono'
+        for start in range(0, len(y), 1024):
+            frame = av.AudioFrame.from_ndarray(y[np.newaxis, start:start + 1024], format='flt', layout='mono')
+            frame.sample_rate = sr
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    data = buffer.getvalue()
+
+    decoded, _, decoder = decode(data, 'upload.m4a')
+    part, _, _ = decode(data, 'upload.m4a', offset=1.0, duration=1.0)
+
+    assert decoders_for('upload.m4a') == ['pyav']
+    assert decoder == 'pyav'
+    assert len(decoded) == pytest.approx(3 * sr, rel=0.05)
+    assert len(part) == sr
+    assert source_duration(data, 'upload.m4a') == pytest.approx(3.0, abs=0.1)
@@ -0,0 +1,63 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+librosa = pytest.importorskip('librosa')
+
+from audio_analyzer import MusicAnalyzer
+from audio_analyzer.features import FeatureEngine
+from audio_analyzer.genre import GenreModel
+
+SR = 22050
+
+
+@pytest.fixture
+def signal():
+    # A chord over clicks at 120 BPM, with some noise so every feature has something to measure
+    t = np.arange(10 * SR) / SR
+    y = sum(0.2 * np.sin(2 * np.pi * f * t) for f in (261.63, 329.63, 392.0))
+    y[::SR // 2] += 1.0
+    y += 0.01 * np.random.default_rng(0).standard_normal(len(t))
+    return y.astype(np.float32)
+
+
+def test_shared_spectrogram_features_match_librosa(signal):
+    engine = FeatureEngine(signal, SR)
+
+    np.testing.assert_allclose(engine.mfcc(), librosa.feature.mfcc(y=signal, sr=SR, n_mfcc=13), rtol=1e-4, atol=1e-3)
+    np.testing.assert_allclose(engine.chroma(), librosa.feature.chroma_stft(y=signal, sr=SR), rtol=1e-4, atol=1e-5)
+    np.testing.assert_allclose(engine.spectral_centroid(), librosa.feature.spectral_centroid(y=signal, sr=SR), rtol=1e-4)
+    np.testing.assert_allclose(engine.spectral_rolloff(), librosa.feature.spectral_rolloff(y=signal, sr=SR))
+    np.testing.assert_allclose(engine.zero_crossing_rate(), librosa.feature.zero_crossing_rate(signal))
+
+
+def test_compute_features_reports_every_stage(signal):
+    from audio_analyzer.metrics import StageTimer
+
+    timer = StageTimer()
+    features = MusicAnalyzer(genre_model=GenreModel(path=None)).compute_features(signal, SR, timer=timer)
+
+    assert len(features['mfcc_mean']) == len(features['mfcc_std']) == 13
+    assert len(features['chroma_mean']) == 12
+    assert {'spectrogram', 'tempo', 'key', 'mfcc', 'spectral', 'zcr', 'rolloff'} <= set(timer.wall)
+
+
+@pytest.mark.parametrize('feature', ['chroma', 'mfcc', 'spectral_centroid', 'spectral_rolloff',
+                                     'zero_crossing_rate', 'onset_strength'])
+def test_float32_engine_matches_float64(signal, feature):
+    reference = getattr(FeatureEngine(signal, SR), feature)()
+    candidate = getattr(FeatureEngine(signal, SR, float32=True), feature)()
+
+    assert candidate.shape == reference.shape
+    scale = np.max(np.abs(reference))
+    np.testing.assert_allclose(candidate, reference, rtol=1e-4, atol=1e-4 * scale)
+
+
+def test_float32_analysis_matches_float64(signal):
+    model = GenreModel(path=None)
+    reference = MusicAnalyzer(genre_model=model).compute_features(signal, SR)
+    candidate = MusicAnalyzer(genre_model=model, float32=True).compute_features(signal, SR)
+
+    assert candidate['key'] == reference['key']
+    assert candidate['bpm'] == pytest.approx(reference['bpm'])
+    for name in ('mfcc_mean', 'chroma_mean', 'spectral_centroid_mean', 'zcr_mean', 'rolloff_mean'):
+        np.testing.assert_allclose(candidate[name], reference[name], rtol=1e-4, atol=1e-3)
@@ -0,0 +1,70 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from audio_analyzer.fingerprint import BITS, FRAMES, FingerprintIndex, bit_error_rates, popcount
+
+RESULT = {'key': 'C major', 'bpm': 120.0, 'genre': 'Pop'}
+
+
+def random_fingerprints(n, seed=0):
+    return np.random.default_rng(seed).integers(0, 2 ** BITS, size=(n, FRAMES), dtype=np.uint32)
+
+
+def test_popcount_counts_set_bits():
+    values = np.array([0, 1, 0xFF, 2 ** 63 + 5, 2 ** 64 - 1], dtype=np.uint64)
+
+    assert popcount(values).tolist() == [bin(int(v)).count('1') for v in values]
+
+
+def test_bit_error_rates_tolerate_small_shifts():
+    rows = random_fingerprints(3)
+    query = np.roll(rows[1], 1)
+
+    rates = bit_error_rates(query, rows)
+
+    assert rates[1] == 0.0
+    assert rates[0] == pytest.approx(0.5, abs=0.05)
+    assert rates[2] == pytest.approx(0.5, abs=0.05)
+
+
+def test_lookup_finds_indexed_track(tmp_path):
+    index = FingerprintIndex(str(tmp_path / 'fingerprints.sqlite3'), version='1')
+    rows = random_fingerprints(2)
+    index.add(rows[0], RESULT, duration=200.0)
+    index.add(rows[1], dict(RESULT, key='A minor'), duration=180.0)
+
+    result, rate = index.lookup(rows[1], duration=181.0)
+
+    assert result['key'] == 'A minor'
+    assert rate == 0.0
+
+
+def test_lookup_skips_tracks_of_another_length(tmp_path):
+    index = FingerprintIndex(str(tmp_path / 'fingerprints.sqlite3'), version='1')
+    query = random_fingerprints(1)[0]
+    index.add(query, RESULT, duration=100.0)
+
+    assert index.lookup(query, duration=300.0) is None
+    assert index.lookup(query) is not None
+
+
+def test_lookup_ignores_other_versions(tmp_path):
+    path = str(tmp_path / 'fingerprints.sqlite3')
+    query = random_fingerprints(1)[0]
+    FingerprintIndex(path, version='1').add(query, RESULT)
+
+    assert FingerprintIndex(path, version='2').lookup(query) is None
+
+
+def test_oldest_fingerprints_are_evicted(tmp_path):
+    path = str(tmp_path / 'fingerprints.sqlite3')
+    index = FingerprintIndex(path, version='1', max_entries=2)
+    rows = random_fingerprints(3)
+    for row in rows:
+        index.add(row, RESULT)
+
+    assert index.lookup(rows[0]) is None
+    assert index.lookup(rows[2]) is not None
+    # A fresh process loads only what is left on disk
+    assert FingerprintIndex(path, version='1', max_entries=2).lookup(rows[0]) is None
@@ -0,0 +1,91 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from audio_analyzer.analyzer import MusicAnalyzer
+from audio_analyzer.genre import MODEL_FEATURES, MODEL_PATH, MODEL_WIDTH, GenreModel, feature_matrix, feature_vector
+
+
+def features(bpm=120.0, centroid=2200.0, zcr=0.05):
+    return {
+        'bpm': bpm,
+        'mfcc_mean': list(range(13)),
+        'spectral_centroid_mean': centroid,
+        'spectral_centroid_std': 1.0,
+        'zcr_mean': zcr,
+        'zcr_std': 0.01,
+        'rolloff_mean': 4000.0,
+        'rolloff_std': 2.0,
+    }
+
+
+def test_feature_vector_follows_model_layout():
+    vector = feature_vector(features(bpm=98.0))
+
+    assert vector.shape == (MODEL_WIDTH,)
+    assert vector[0] == 98.0
+    np.testing.assert_array_equal(vector[1:14], np.arange(13))
+    assert MODEL_FEATURES[0] == ('bpm', 1)
+
+
+def test_feature_matrix_stacks_tracks():
+    assert feature_matrix([]).shape == (0, MODEL_WIDTH)
+    assert feature_matrix([features(), features(bpm=90.0)]).shape == (2, MODEL_WIDTH)
+
+
+def test_disabled_model_predicts_nothing():
+    model = GenreModel(path=None)
+
+    assert model.predict([features()]) is None
+    assert model.predict([]) == []
+    assert model.error is None
+
+
+def test_missing_file_records_error(tmp_path):
+    model = GenreModel(path=str(tmp_path / 'missing.joblib'))
+
+    assert model.load() is None
+    assert model.error is not None
+    assert model.predict([features()]) is None
+
+
+def test_load_is_deferred_until_first_use():
+    model = GenreModel(path=None)
+
+    assert not model._loaded
+    model.load()
+    assert model._loaded
+
+
+def test_shipped_model_predicts_a_class_per_track():
+    pytest.importorskip('sklearn')
+    pytest.importorskip('joblib')
+    model = GenreModel(MODEL_PATH)
+    if model.load() is None:
+        pytest.skip(f"shipped model does not load here: {model.error}")
+
+    genres = model.predict([features(), features(bpm=150.0, centroid=3500.0)])
+
+    assert len(genres) == 2
+    assert set(genres) <= set(model.classes)
+
+
+def test_analyzer_falls_back_to_heuristics_without_a_model():
+    analyzer = MusicAnalyzer(genre_model=GenreModel(path=None))
+
+    assert analyzer.predict_genres([features(bpm=150.0, centroid=3500.0), features(bpm=130.0)]) == \
+        ['Electronic/Dance', 'Pop/Rock']
+
+
+def test_heuristics_are_the_default_and_the_model_opt_in():
+    from audio_analyzer.analyzer import analysis_version
+    from audio_analyzer.pool import build_analyzer
+
+    assert MusicAnalyzer().genre_model.path is None
+    assert 'genre_model_path' not in MusicAnalyzer().worker_options()
+
+    options = MusicAnalyzer(genre_model=GenreModel(MODEL_PATH)).worker_options()
+
+    assert options['genre_model_path'] == MODEL_PATH
+    assert build_analyzer(options).genre_model.path == MODEL_PATH
+    assert analysis_version(genre_model=True).endswith('+model')
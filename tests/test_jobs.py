@@ -0,0 +1,123 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from admission import AdmissionController, Overloaded
+from jobs import FAILED, FINISHED, JobQueue
+
+
+def double(x):
+    return 2 * x
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        yield executor
+
+
+def wait(queue, job_id):
+    job = queue.get(job_id)
+    job.future.exception(timeout=5)
+    return job
+
+
+def eventually(condition, timeout=5.0):
+    # Done callbacks run just after the future's waiters are woken
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_submit_runs_job_and_reports_result(executor):
+    results = []
+    queue = JobQueue(executor, on_result=results.append)
+
+    job = wait(queue, queue.submit(double, 21, filename='a.wav'))
+
+    assert job.to_dict() == {'job_id': job.id, 'status': FINISHED, 'filename': 'a.wav', 'results': 42}
+    assert eventually(lambda: results == [42])
+
+
+def test_failed_job_keeps_its_error(executor):
+    errors = []
+    queue = JobQueue(executor, on_error=errors.append)
+
+    job = wait(queue, queue.submit(fail, 'bad file', filename='b.wav'))
+
+    assert job.status == FAILED
+    assert job.to_dict()['error'] == 'bad file'
+    # Reported once when the job failed, not again on every poll
+    assert eventually(lambda: errors == ['bad file'])
+    queue.get(job.id).to_dict()
+    assert errors == ['bad file']
+
+
+def test_submit_many_returns_one_job_per_call(executor):
+    queue = JobQueue(executor)
+
+    job_ids = queue.submit_many([(double, (i,), f"{i}.wav", 1.0) for i in range(3)])
+
+    assert len(set(job_ids)) == 3
+    assert [wait(queue, job_id).result for job_id in job_ids] == [0, 2, 4]
+    assert [queue.get(job_id).filename for job_id in job_ids] == ['0.wav', '1.wav', '2.wav']
+
+
+def test_submit_many_is_admitted_all_or_nothing(executor):
+    release = threading.Event()
+    queue = JobQueue(executor, admission=AdmissionController(executor, max_in_flight=1, max_queued=1))
+    queue.submit(release.wait, 5, weight=1.0)
+
+    with pytest.raises(Overloaded):
+        queue.submit_many([(double, (i,), None, 1.0) for i in range(2)])
+    assert queue.depth() == 1
+    release.set()
+
+
+def test_unknown_job_is_none(executor):
+    assert JobQueue(executor).get('missing') is None
+
+
+def test_finished_jobs_expire_after_ttl(executor):
+    queue = JobQueue(executor, ttl=0)
+    old = queue.submit(double, 1)
+    assert eventually(lambda: queue.get(old).finished is not None)
+    time.sleep(0.01)
+
+    queue.submit(double, 2)
+
+    assert queue.get(old) is None
+
+
+def test_depth_and_in_flight_count_unfinished_jobs(executor):
+    release = threading.Event()
+    queue = JobQueue(executor)
+    running = [queue.submit(release.wait, 5) for _ in range(2)]
+    waiting = queue.submit(release.wait, 5)
+
+    assert eventually(lambda: queue.in_flight() == 2)
+    assert queue.depth() == 3
+    assert queue.get(waiting).status == 'queued'
+    release.set()
+    assert eventually(lambda: queue.depth() == 0)
+    assert all(queue.get(job_id).status == FINISHED for job_id in running)
+
+
+def test_admitted_jobs_run_only_when_a_worker_starts_them():
+    release = threading.Event()
+    with ThreadPoolExecutor(max_workers=1) as single:
+        queue = JobQueue(single, admission=AdmissionController(single, max_in_flight=1, max_queued=4))
+        job_ids = [queue.submit(release.wait, 5, weight=0.1) for _ in range(5)]
+
+        assert eventually(lambda: queue.in_flight() == 1)
+        assert queue.depth() == 5
+        assert [queue.get(job_id).status for job_id in job_ids].count('queued') == 4
+        release.set()
+        assert eventually(lambda: queue.depth() == 0)
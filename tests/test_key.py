@@ -0,0 +1,31 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from audio_analyzer.key import (KEY_NAMES, MAJOR_PROFILE, MINOR_PROFILE, PITCH_CLASSES, estimate_key, estimate_keys,
+                                score_keys)
+
+
+@pytest.mark.parametrize('tonic', range(12))
+def test_profiles_identify_their_own_key(tonic):
+    assert estimate_key(np.roll(MAJOR_PROFILE, tonic)) == PITCH_CLASSES[tonic]
+    assert estimate_key(np.roll(MINOR_PROFILE, tonic)) == f"{PITCH_CLASSES[tonic]}m"
+
+
+def test_batch_scoring_matches_one_at_a_time():
+    chroma = np.random.default_rng(0).random((5, 12))
+
+    assert score_keys(chroma).shape == (5, 24)
+    np.testing.assert_allclose(score_keys(chroma)[3], score_keys(chroma[3]))
+    assert estimate_keys(chroma) == [estimate_key(row) for row in chroma]
+
+
+def test_scores_are_correlations():
+    scores = score_keys(MAJOR_PROFILE)
+
+    assert scores[KEY_NAMES.index('C')] == pytest.approx(1.0)
+    assert np.all(np.abs(scores) <= 1.0 + 1e-9)
+
+
+def test_flat_chroma_does_not_fail():
+    assert estimate_key(np.ones(12)) in KEY_NAMES
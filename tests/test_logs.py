@@ -0,0 +1,55 @@
+import atexit
+import logging
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from audio_analyzer.logs import SamplingFilter, _start_listener, configure_logging
+
+
+def record(level, msg, args=()):
+    return logging.LogRecord('audio_analyzer.analyzer', level, __file__, 1, msg, args, None)
+
+
+class Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_sampling_filter_passes_one_debug_line_in_every_n_per_template():
+    sampler = SamplingFilter(3)
+
+    passed = [sampler.filter(record(logging.DEBUG, 'BPM: %s', (i,))) for i in range(7)]
+
+    assert passed == [True, False, False, True, False, False, True]
+    assert sampler.filter(record(logging.DEBUG, 'Key: %s', ('C',)))
+    assert all(sampler.filter(record(logging.INFO, 'BPM: %s', (i,))) for i in range(3))
+
+
+def test_sampling_filter_can_drop_all_debug_lines():
+    sampler = SamplingFilter(0)
+
+    assert not sampler.filter(record(logging.DEBUG, 'BPM: %s', (120,)))
+    assert sampler.filter(record(logging.WARNING, 'slow'))
+
+
+def test_listener_formats_records_off_the_calling_thread():
+    handler = Collect()
+    queue_handler, listener = _start_listener([handler], sample_every=1)
+    try:
+        queue_handler.handle(record(logging.INFO, 'Analyzed %s in %.1fs', ('a.wav', 1.25)))
+    finally:
+        listener.stop()
+        atexit.unregister(listener.stop)
+
+    assert handler.messages == ['Analyzed a.wav in 1.2s']
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError, match='Unknown log mode'):
+        configure_logging('verbose')
@@ -0,0 +1,75 @@
+import tracemalloc
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from audio_analyzer.metrics import AnalysisMetrics, Histogram, StageTimer
+
+
+def test_stage_timer_adds_up_repeated_stages_in_pipeline_order():
+    timer = StageTimer(cpu=True)
+    for stage in ('genre', 'tempo', 'tempo', 'custom'):
+        with timer.stage(stage):
+            pass
+
+    assert list(timer.as_dict()) == ['tempo', 'genre', 'custom']
+    assert set(timer.cpu) == {'tempo', 'genre', 'custom'}
+    assert timer.memory is None
+    assert timer.memory_report() == ''
+
+
+def test_stage_timer_records_time_when_the_stage_raises():
+    timer = StageTimer()
+    with pytest.raises(ValueError):
+        with timer.stage('decode'):
+            raise ValueError('bad file')
+
+    assert 'decode' in timer.wall
+
+
+def test_stage_timer_audits_allocations_while_tracing():
+    tracemalloc.start()
+    try:
+        timer = StageTimer()
+        with timer.stage('spectrogram'):
+            block = bytearray(4 * 2 ** 20)
+        del block
+    finally:
+        tracemalloc.stop()
+
+    assert timer.memory['spectrogram'] >= 4 * 2 ** 20
+    assert timer.memory_report().startswith('spectrogram=4.')
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('latency_seconds', 'Latency', 'stage', buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe('tempo', value)
+
+    lines = histogram.render()
+
+    assert 'latency_seconds_bucket{stage="tempo",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="tempo",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{stage="tempo",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{stage="tempo"} 3' in lines
+    assert 'latency_seconds_sum{stage="tempo"} 5.55' in lines
+
+
+def test_analysis_metrics_render():
+    metrics = AnalysisMetrics()
+    metrics.observe({'timings': {'decode': 0.2, 'tempo': 0.3}, 'mode': 'preview'})
+    metrics.observe({'key': 'C'})
+
+    text = metrics.render({'analysis_queue_depth': ('Jobs waiting', 4)})
+
+    assert 'analysis_stage_seconds_count{stage="decode"} 1' in text
+    assert 'analysis_seconds_sum{mode="preview"} 0.5' in text
+    assert 'analysis_seconds_count{mode="full"}' not in text
+    assert '# TYPE analysis_queue_depth gauge\nanalysis_queue_depth 4\n' in text
+
+
+def test_counters_are_typed_as_counters():
+    text = AnalysisMetrics().render(counters={'analysis_admission_rejected_total': ('Rejected requests', 2)})
+
+    assert '# TYPE analysis_admission_rejected_total counter\nanalysis_admission_rejected_total 2\n' in text
@@ -0,0 +1,81 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('soundfile')
+
+from audio_analyzer.multitrack import chunks, load_stack, masked_stats
+
+
+def test_masked_stats_ignore_padding():
+    rng = np.random.default_rng(0)
+    frames = rng.random((3, 2, 10))
+    counts = np.array([10, 4, 0])
+
+    mean, std = masked_stats(frames, counts)
+
+    assert mean.shape == std.shape == (3, 2)
+    np.testing.assert_allclose(mean[0], frames[0].mean(axis=1))
+    np.testing.assert_allclose(mean[1], frames[1, :, :4].mean(axis=1))
+    np.testing.assert_allclose(std[1], frames[1, :, :4].std(axis=1))
+    np.testing.assert_array_equal(mean[2], 0.0)
+
+
+def test_chunks():
+    assert list(chunks(range(5), size=2)) == [[0, 1], [2, 3], [4]]
+    assert list(chunks([], size=2)) == []
+
+
+def test_load_stack_keeps_rows_aligned(click_track, tmp_path):
+    short = click_track(120, duration=2.0, name='short.wav')
+    long = click_track(120, duration=40.0, name='long.wav')
+    broken = tmp_path / 'broken.wav'
+    broken.write_bytes(b'not audio')
+
+    stack, lengths, decoders = load_stack([short, str(broken), long], length=30.0)
+
+    assert stack.shape == (3, 30 * 22050)
+    assert lengths.tolist() == [2 * 22050, 0, 30 * 22050]
+    assert decoders == ['soundfile', None, 'soundfile']
+    assert not np.any(stack[0, lengths[0]:])
+    assert not np.any(stack[1])
+
+
+def test_excerpts_match_tracks_analyzed_alone(click_track):
+    pytest.importorskip('librosa')
+    from audio_analyzer import MusicAnalyzer
+    from audio_analyzer.genre import GenreModel
+
+    paths = [click_track(90, duration=12.0, name='a.wav'), click_track(140, duration=20.0, name='b.wav')]
+    analyzer = MusicAnalyzer(genre_model=GenreModel(path=None))
+
+    together = analyzer.analyze_excerpts(paths)
+    alone = [analyzer.analyze_excerpts([path])[0] for path in paths]
+
+    for stacked, single in zip(together, alone):
+        assert stacked['mode'] == 'excerpt'
+        assert stacked['bpm'] == pytest.approx(single['bpm'], rel=1e-3)
+        assert stacked['key'] == single['key']
+        np.testing.assert_allclose(stacked['features']['mfcc_mean'], single['features']['mfcc_mean'], rtol=1e-3, atol=1e-3)
+
+
+@pytest.mark.parametrize('float32', [False, True])
+def test_stacked_chroma_matches_each_track_alone(float32):
+    librosa = pytest.importorskip('librosa')
+    from audio_analyzer.features import FeatureEngine
+
+    sr = 22050
+    t = np.arange(4 * sr) / sr
+    tracks = [np.sin(2 * np.pi * 440.0 * t[:2 * sr]), np.sin(2 * np.pi * 261.63 * t) + np.sin(2 * np.pi * 329.63 * t)]
+    stack = np.zeros((2, 4 * sr), dtype=np.float32)
+    for row, y in zip(stack, tracks):
+        row[:len(y)] = y
+    engine = FeatureEngine(stack, sr, float32=float32)
+    frames = engine.frame_counts([len(y) for y in tracks], sr)
+
+    means = engine.stack_chroma_means(frames)
+
+    for i, count in enumerate(frames):
+        power = engine.power[i, :, :count]
+        tuning = engine._tuning(power)
+        alone = np.mean(librosa.feature.chroma_stft(S=power, sr=sr, tuning=tuning), axis=1)
+        np.testing.assert_allclose(means[i], alone, rtol=1e-4, atol=1e-5)
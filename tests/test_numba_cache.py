@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from audio_analyzer.lazy import configure_numba_cache
+
+
+def test_sets_and_creates_the_cache_directory(monkeypatch, tmp_path):
+    monkeypatch.delenv('NUMBA_CACHE_DIR', raising=False)
+    path = tmp_path / 'numba'
+
+    assert configure_numba_cache(str(path)) == str(path)
+    assert os.environ['NUMBA_CACHE_DIR'] == str(path)
+    assert path.is_dir()
+
+
+def test_existing_environment_variable_wins(monkeypatch, tmp_path):
+    monkeypatch.setenv('NUMBA_CACHE_DIR', str(tmp_path / 'configured'))
+
+    assert configure_numba_cache(str(tmp_path / 'other')) == str(tmp_path / 'configured')
+    assert (tmp_path / 'configured').is_dir()
+    assert not (tmp_path / 'other').exists()
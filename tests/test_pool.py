@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('librosa')
+
+from audio_analyzer import MusicAnalyzer
+from audio_analyzer.batch import scan
+from audio_analyzer.genre import GenreModel
+from audio_analyzer.pool import START_METHOD
+
+
+def test_start_method_never_forks():
+    assert START_METHOD in ('forkserver', 'spawn')
+
+
+def test_analyze_many_with_two_workers(click_track):
+    paths = [click_track(bpm, name=f"{i}.wav") for i, bpm in enumerate((90, 120, 140))]
+    analyzer = MusicAnalyzer(genre_model=GenreModel(path=None))
+
+    results = dict(analyzer.analyze_many(paths, workers=2))
+
+    assert sorted(results) == sorted(paths)
+    assert all(result is not None for result in results.values())
+
+
+def test_scan_with_two_workers_finishes(click_track, tmp_path):
+    for i in range(3):
+        click_track(120, name=f"{i}.wav")
+    output = tmp_path / 'results.jsonl'
+
+    count = scan(MusicAnalyzer(genre_model=GenreModel(path=None)), str(tmp_path), str(output), workers=2)
+
+    assert count == 3
+    assert len(output.read_text().splitlines()) == 3
+
+
+def test_worker_processes_log_through_the_parent(click_track, tmp_path):
+    click_track(120, name='a.wav')
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    scan_run = subprocess.run(
+        [sys.executable, '-m', 'audio_analyzer', 'scan', str(tmp_path), '--audit', '-w', '1',
+         '-o', str(tmp_path / 'results.jsonl')],
+        cwd=root, capture_output=True, text=True, timeout=300,
+    )
+
+    assert scan_run.returncode == 0, scan_run.stderr
+    assert 'warmed up' in scan_run.stderr
+    assert 'Stage allocation peaks for' in scan_run.stderr
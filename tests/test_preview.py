@@ -0,0 +1,49 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from audio_analyzer.preview import SCALAR_FEATURES, combine_excerpts, excerpt_offsets, load_excerpts
+
+
+def test_short_track_is_one_excerpt_from_the_start():
+    assert excerpt_offsets(15.0, count=3, length=20.0) == [0.0]
+
+
+def test_offsets_spread_evenly_away_from_the_edges():
+    assert excerpt_offsets(200.0, count=3, length=20.0) == [40.0, 90.0, 140.0]
+
+
+def test_offsets_stay_inside_the_track():
+    offsets = excerpt_offsets(30.0, count=3, length=20.0)
+
+    assert all(0.0 <= offset <= 10.0 for offset in offsets)
+    assert offsets == sorted(offsets)
+
+
+def excerpt(bpm, key, value=1.0):
+    features = {'bpm': bpm, 'key': key, 'chroma_mean': [value] * 12,
+                'mfcc_mean': [value] * 13, 'mfcc_std': [value] * 13}
+    features.update({name: value for name in SCALAR_FEATURES})
+    return features
+
+
+def test_combine_votes_and_scores_agreement():
+    combined = combine_excerpts([excerpt(120.0, 'C major', 1.0), excerpt(121.0, 'C major', 2.0),
+                                 excerpt(90.0, 'A minor', 3.0)])
+
+    assert combined['bpm'] == 120.0
+    assert combined['key'] == 'C major'
+    assert combined['mfcc_mean'] == [2.0] * 13
+    assert combined['zcr_mean'] == 2.0
+    # Two of three excerpts agree on both BPM and key
+    assert combined['confidence'] == 0.67
+
+
+def test_load_excerpts_decodes_only_the_excerpts(click_track):
+    path = click_track(120, duration=60.0)
+
+    excerpts, duration, decoder = load_excerpts(path, count=3, length=5.0)
+
+    assert duration == pytest.approx(60.0)
+    assert decoder == 'soundfile'
+    assert [len(y) for y in excerpts] == [5 * 22050] * 3
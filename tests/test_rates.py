@@ -0,0 +1,49 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from audio_analyzer import analysis_version
+from audio_analyzer.analyzer import ANALYZER_VERSION
+from audio_analyzer.features import FULL_RATES, HOP_LENGTH, N_FFT, REDUCED_RATES, frame_size, rates_tag
+
+
+def test_frame_size_keeps_duration_on_powers_of_two():
+    assert frame_size(N_FFT, 22050) == N_FFT
+    assert frame_size(N_FFT, 11025) == N_FFT // 2
+    assert frame_size(HOP_LENGTH, 44100) == HOP_LENGTH * 2
+
+
+def test_rates_tag_is_stable():
+    assert rates_tag(REDUCED_RATES) == 'chroma11025-spectral22050-tempo11025'
+    assert rates_tag(dict(reversed(list(REDUCED_RATES.items())))) == rates_tag(REDUCED_RATES)
+
+
+def test_analysis_version_separates_profiles():
+    assert analysis_version() == analysis_version(FULL_RATES) == ANALYZER_VERSION
+    assert analysis_version(REDUCED_RATES) == f"{ANALYZER_VERSION}+chroma11025-spectral22050-tempo11025"
+    assert analysis_version(float32=True, drop_gaps=True) == f"{ANALYZER_VERSION}+float32+gaps"
+
+
+def test_engines_are_shared_per_rate():
+    pytest.importorskip('librosa')
+    from audio_analyzer.features import engines_for_rates
+
+    y = np.random.default_rng(0).uniform(-0.5, 0.5, 22050 * 5).astype(np.float32)
+    engines = engines_for_rates(y, 22050, REDUCED_RATES)
+
+    assert engines['tempo'] is engines['chroma']
+    assert engines['tempo'].sr == 11025
+    assert engines['tempo'].n_fft == N_FFT // 2
+    assert engines['spectral'].sr == 22050
+    # Same frames per second at either rate
+    assert abs(engines['tempo'].magnitude.shape[-1] - engines['spectral'].magnitude.shape[-1]) <= 1
+
+
+def test_rates_are_never_upsampled():
+    pytest.importorskip('librosa')
+    from audio_analyzer.features import engines_for_rates
+
+    y = np.zeros(11025 * 2, dtype=np.float32)
+    engines = engines_for_rates(y, 11025, FULL_RATES)
+
+    assert {engine.sr for engine in engines.values()} == {11025}
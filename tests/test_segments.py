@@ -0,0 +1,41 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from audio_analyzer.key import MAJOR_PROFILE, MINOR_PROFILE
+from audio_analyzer.segments import change_points, key_curve, window_means
+
+
+def test_window_means_match_direct_means():
+    frames = np.arange(20, dtype=float).reshape(2, 10)
+
+    means, starts = window_means(frames, window=4, hop=3)
+
+    assert starts.tolist() == [0, 3, 6]
+    np.testing.assert_allclose(means, np.array([frames[:, s:s + 4].mean(axis=1) for s in starts]).T)
+
+
+def test_short_signal_is_one_window():
+    means, starts = window_means(np.ones((12, 5)), window=100, hop=10)
+
+    assert starts.tolist() == [0]
+    assert means.shape == (12, 1)
+
+
+def test_key_curve_follows_a_modulation():
+    # 60 s in C major, then 60 s in A minor, at one chroma frame per second
+    chroma = np.concatenate([np.tile(MAJOR_PROFILE[:, None], 60), np.tile(np.roll(MINOR_PROFILE, 9)[:, None], 60)],
+                            axis=1)
+
+    times, keys = key_curve(chroma, sr=1, hop_length=1, window=10, hop=10)
+
+    assert keys[0] == 'C' and keys[-1] == 'Am'
+    changes = change_points(times, keys, lambda a, b: a != b)
+    assert [change['value'] for change in changes] == ['Am']
+    assert changes[0]['time'] == pytest.approx(60.0, abs=10.0)
+
+
+def test_change_points_report_each_change_once():
+    changes = change_points([0, 5, 10, 15], [120, 120, 140, 140], lambda a, b: a != b)
+
+    assert changes == [{'time': 10.0, 'value': 140}]
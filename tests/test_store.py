@@ -0,0 +1,72 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from audio_analyzer.store import COLUMNS, FeatureStore, rescore
+
+
+def features(seed):
+    rng = np.random.default_rng(seed)
+    return {name: float(rng.random()) if width == 1 else rng.random(width).tolist()
+            for name, width in COLUMNS.items()}
+
+
+class FixedGenres:
+    def predict_genres(self, features_list):
+        return ['Jazz'] * len(features_list)
+
+
+def test_rows_round_trip():
+    stored = features(0)
+
+    restored = FeatureStore.from_row(FeatureStore.to_row(stored))
+
+    assert restored['bpm'] == pytest.approx(stored['bpm'])
+    np.testing.assert_allclose(restored['mfcc_mean'], stored['mfcc_mean'], rtol=1e-6)
+
+
+def test_compact_folds_pending_rows_into_columns(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    store.put('a', features(0))
+    store.put('b', features(1))
+
+    assert store.pending_count() == 2
+    assert store.compact() == 2
+    assert store.pending_count() == 0
+    assert store.hashes() == ['a', 'b']
+    assert store.column('chroma_mean').shape == (2, 12)
+    assert store.column('bpm')[1, 0] == pytest.approx(features(1)['bpm'])
+
+
+def test_compact_waits_for_min_pending(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    store.put('a', features(0))
+
+    assert store.compact(min_pending=2) == 0
+    assert store.hashes() == []
+    store.put('b', features(1))
+    assert store.compact(min_pending=2) == 2
+
+
+def test_reanalyzed_track_overwrites_its_row(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    store.put('a', features(0))
+    store.compact()
+    store.put('a', features(1))
+    store.compact()
+
+    assert store.hashes() == ['a']
+    assert store.column('bpm')[0, 0] == pytest.approx(features(1)['bpm'])
+
+
+def test_rescore_covers_every_stored_track(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    for i, content_hash in enumerate('abc'):
+        store.put(content_hash, features(i))
+    store.compact()
+
+    rescored = list(rescore(store, FixedGenres()))
+
+    assert [content_hash for content_hash, _, _ in rescored] == ['a', 'b', 'c']
+    assert all(genre == 'Jazz' for _, _, genre in rescored)
+    assert all(isinstance(key, str) for _, key, _ in rescored)
@@ -0,0 +1,45 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from audio_analyzer.streaming import BLOCK_LENGTH, RunningMoments, resampled_blocks
+from audio_analyzer.features import HOP_LENGTH, N_FFT
+
+
+def test_running_moments_match_numpy():
+    frames = np.random.default_rng(0).normal(size=(3, 1000))
+    moments = RunningMoments()
+    for start in range(0, 1000, 137):
+        moments.update(frames[:, start:start + 137])
+
+    assert moments.count == 1000
+    np.testing.assert_allclose(moments.mean, frames.mean(axis=1))
+    np.testing.assert_allclose(moments.std, frames.std(axis=1))
+
+
+def test_blocks_are_resampled_to_the_analysis_rate(click_track):
+    pytest.importorskip('soxr')
+    path = click_track(120, duration=20.0, sr=44100)
+
+    blocks = list(resampled_blocks(path, sr=22050))
+
+    step = BLOCK_LENGTH * HOP_LENGTH
+    assert all(len(block) == N_FFT + step - HOP_LENGTH for block in blocks[:-1])
+    # Blocks advance by step samples at 22050 Hz, so together they cover the resampled signal
+    covered = step * (len(blocks) - 1) + len(blocks[-1])
+    assert abs(covered - 20.0 * 22050) < step
+
+
+def test_streamed_features_match_in_memory_analysis(click_track):
+    pytest.importorskip('librosa')
+    from audio_analyzer import MusicAnalyzer
+    from audio_analyzer.genre import GenreModel
+
+    path = click_track(120, duration=30.0, sr=44100)
+    analyzer = MusicAnalyzer(genre_model=GenreModel(path=None))
+
+    streamed = analyzer.extract_features(path, streaming=True)
+    loaded = analyzer.extract_features(path)
+
+    assert streamed['bpm'] == pytest.approx(loaded['bpm'], rel=0.02)
+    assert streamed['spectral_centroid_mean'] == pytest.approx(loaded['spectral_centroid_mean'], rel=0.05)
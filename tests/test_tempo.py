@@ -0,0 +1,86 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+librosa = pytest.importorskip('librosa')
+
+from audio_analyzer.features import FeatureEngine
+from audio_analyzer.tempo import TempoEstimator, fold_octave
+
+SR = 22050
+
+
+def clicks(bpm, duration=20.0):
+    y = np.zeros(int(duration * SR), dtype=np.float32)
+    y[::int(SR * 60 / bpm)] = 1.0
+    return y
+
+
+@pytest.mark.parametrize('bpm', [90, 120, 140])
+def test_estimators_find_click_tempo(bpm):
+    engine = FeatureEngine(clicks(bpm), SR)
+    estimator = TempoEstimator(engine.onset_strength(), SR, engine.hop_length)
+
+    # Octave errors are the usual failure, so a few percent is a real match
+    assert estimator.primary() == pytest.approx(bpm, rel=0.04)
+    assert estimator.secondary() == pytest.approx(bpm, rel=0.04)
+
+
+def test_columns_gives_one_tempo_per_window():
+    engine = FeatureEngine(clicks(120), SR)
+    estimator = TempoEstimator(engine.onset_strength(), SR, engine.hop_length)
+    windows = np.stack([estimator.tempogram[:, :200].mean(axis=1), estimator.tempogram[:, 200:].mean(axis=1)], axis=1)
+
+    tempi = estimator.columns(windows)
+
+    assert tempi.shape == (2,)
+    assert tempi == pytest.approx([120, 120], rel=0.04)
+
+
+def test_shared_onset_envelope_matches_librosa():
+    y = clicks(120, duration=10.0)
+
+    np.testing.assert_allclose(FeatureEngine(y, SR).onset_strength(),
+                               librosa.onset.onset_strength(y=y, sr=SR), rtol=1e-4, atol=1e-4)
+
+
+class FixedTempo:
+    def __init__(self, primary, secondary):
+        self._primary, self._secondary = primary, secondary
+
+    def primary(self):
+        return self._primary
+
+    def secondary(self):
+        return self._secondary
+
+
+def test_bpm_uses_primary_unless_estimates_disagree():
+    from audio_analyzer import MusicAnalyzer
+    from audio_analyzer.genre import GenreModel
+
+    analyzer = MusicAnalyzer(genre_model=GenreModel(path=None))
+
+    assert analyzer.estimate_bpm(FixedTempo(120.0, 118.0)) == 120.0
+    assert analyzer.estimate_bpm(FixedTempo(140.0, 100.0)) == 120.0
+    # Half or double time is the same tempo, never averaged across the octave
+    assert analyzer.estimate_bpm(FixedTempo(140.0, 70.0)) == 140.0
+    assert analyzer.estimate_bpm(FixedTempo(90.0, 181.0)) == 90.0
+
+
+def test_fold_octave():
+    assert fold_octave(70.0, 140.0) == 140.0
+    assert fold_octave(300.0, 70.0) == 75.0
+    assert fold_octave(100.0, 140.0) == 100.0
+    assert fold_octave(0.0, 120.0) == 0.0
+
+
+def test_click_track_bpm_matches_beat_track():
+    from audio_analyzer import MusicAnalyzer
+    from audio_analyzer.genre import GenreModel
+
+    y = clicks(140)
+    engine = FeatureEngine(y, SR)
+    bpm = MusicAnalyzer(genre_model=GenreModel(path=None)).estimate_bpm(
+        TempoEstimator(engine.onset_strength(), SR, engine.hop_length))
+
+    assert bpm == pytest.approx(float(np.atleast_1d(librosa.beat.beat_track(y=y, sr=SR)[0])[0]), rel=0.01)
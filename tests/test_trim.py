@@ -0,0 +1,64 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from audio_analyzer.trim import audible_spans, frame_rms, trim_silence
+
+SR = 22050
+
+
+def signal(*parts):
+    """Concatenate (seconds, amplitude) parts of a 440 Hz tone; amplitude 0 is silence"""
+    t = np.arange(sum(int(seconds * SR) for seconds, _ in parts)) / SR
+    amplitude = np.concatenate([np.full(int(seconds * SR), level) for seconds, level in parts])
+    return (amplitude * np.sin(2 * np.pi * 440.0 * t)).astype(np.float32)
+
+
+def test_frame_rms():
+    rms, frame = frame_rms(np.ones(SR, dtype=np.float32), SR)
+
+    assert frame == int(0.1 * SR / 4) * 4
+    np.testing.assert_allclose(rms, 1.0)
+    assert len(frame_rms(np.zeros(0), SR)[0]) == 0
+
+
+def test_silent_edges_are_trimmed():
+    y = signal((3.0, 0.0), (5.0, 0.5), (2.0, 0.0))
+
+    trimmed, spans, removed = trim_silence(y, SR)
+
+    assert len(spans) == 1
+    start, stop = spans[0]
+    assert start == pytest.approx(3.0 * SR, abs=0.1 * SR)
+    assert stop == pytest.approx(8.0 * SR, abs=0.1 * SR)
+    assert removed == pytest.approx(5.0, abs=0.2)
+    assert len(trimmed) == stop - start
+
+
+def test_quiet_music_is_kept():
+    y = signal((2.0, 0.5), (2.0, 0.01), (2.0, 0.5))
+
+    assert audible_spans(y, SR) == [(0, len(y))]
+
+
+def test_all_silence_is_kept_whole():
+    y = np.zeros(SR, dtype=np.float32)
+
+    trimmed, spans, removed = trim_silence(y, SR)
+
+    assert spans == [(0, SR)]
+    assert removed == 0.0
+
+
+def test_long_gaps_dropped_only_when_asked():
+    y = signal((2.0, 0.5), (3.0, 0.0), (2.0, 0.5), (1.0, 0.0), (2.0, 0.5))
+
+    assert len(audible_spans(y, SR)) == 1
+
+    spans = audible_spans(y, SR, drop_gaps=True)
+    trimmed, _, removed = trim_silence(y, SR, drop_gaps=True)
+
+    # The 3 s gap goes; the 1 s gap is shorter than MIN_GAP and stays
+    assert len(spans) == 2
+    assert removed == pytest.approx(3.0, abs=0.2)
+    assert len(trimmed) == sum(stop - start for start, stop in spans)
@@ -0,0 +1,61 @@
+import sys
+from concurrent.futures import Future
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from audio_analyzer import pool
+from audio_analyzer.genre import GenreModel
+from audio_analyzer.lazy import LazyModule
+
+
+def finished(result=None, error=None):
+    future = Future()
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+    return future
+
+
+def test_lazy_module_imports_on_first_attribute(monkeypatch):
+    monkeypatch.delitem(sys.modules, 'colorsys', raising=False)
+    colorsys = LazyModule('colorsys')
+
+    assert 'colorsys' not in sys.modules
+    assert 'not loaded' in repr(colorsys)
+    assert colorsys.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert 'colorsys' in sys.modules
+    assert 'not loaded' not in repr(colorsys)
+
+
+def test_warmup_status(monkeypatch):
+    monkeypatch.setattr(pool, '_warmups', [finished(1), Future()])
+    assert pool.warmup_status() == 'warming'
+
+    monkeypatch.setattr(pool, '_warmups', [finished(1), finished(error=RuntimeError('no librosa'))])
+    assert pool.warmup_status() == 'failed'
+
+    monkeypatch.setattr(pool, '_warmups', [finished(1), finished(2)])
+    assert pool.warmup_status() == 'ready'
+
+
+def test_ping_reports_a_failed_warmup(monkeypatch):
+    monkeypatch.setattr(pool, '_warmup_error', None)
+    assert pool._ping() > 0
+
+    monkeypatch.setattr(pool, '_warmup_error', ImportError('librosa'))
+    with pytest.raises(RuntimeError, match='Warmup failed'):
+        pool._ping()
+
+
+def test_warm_shared_raises_for_an_unloadable_genre_model(monkeypatch, tmp_path):
+    pytest.importorskip('librosa')
+    analyzer = pool.build_analyzer()
+    analyzer.genre_model = GenreModel(str(tmp_path / 'missing.joblib'))
+    monkeypatch.setattr(pool, '_analyzer', analyzer)
+    monkeypatch.setattr(pool, '_prepared', True)
+
+    with pytest.raises(RuntimeError, match='Genre model could not be loaded'):
+        pool._warm_shared()